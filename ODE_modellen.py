@@ -4,7 +4,6 @@
 ## Datum: 26-11-2025      ##
 ############################
 
-from matplotlib import pyplot as plt
 import numpy as np
 import math
 from math import log
@@ -23,6 +22,10 @@ class tumorODE:
         
     def __str__(self):
         return f"Start volume: {self.volume}, aantal dagen (n): {self.n}, tijdsstapgrootte: {self.delta_t}"
+
+    def tijdas(self):
+        """Tijdstippen 0, delta_t, ..., n*delta_t, opeenvolgend opgeteld zoals in de lussen."""
+        return np.cumsum(np.concatenate(([0.0], np.full(self.n, self.delta_t))))
         
 
     def linear_model(self, c, mode=None):
@@ -284,33 +287,30 @@ class tumorODE:
         return t_list, v_list
     
     def compute_curve(self,a, b, y0):
+        # dy/dt = a * y + b is affien, dus elke stap hieronder is y -> alpha * y + beta met
+        # vaste alpha en beta. Met h = a * dt geeft deze Runge-Kutta variant (de vierde
+        # update gebruikt dydt2): y_nieuw = y + dt * g * (a*y + b), g = 1 + h/2 + h^2/6.
+        # Het hele traject volgt dan in één keer uit y_k = y0*alpha^k + beta*(alpha^k - 1)/(alpha - 1),
+        # gelijk aan de stap-voor-stap lus op afronding na.
+        h = a * self.delta_t
+        g = 1 + h / 2 + h * h / 6
+        delta = h * g                       # alpha - 1
+        beta = b * self.delta_t * g
+
+        k = np.arange(self.n + 1)
+        if delta > -1:
+            macht = np.exp(k * np.log1p(delta))
+            groei = np.expm1(k * np.log1p(delta))
+        else:
+            # alpha <= 0: geen logaritme, maar alpha^k met gehele k bestaat gewoon
+            macht = np.power(1 + delta, k)
+            groei = macht - 1
+        som = groei / delta if delta != 0 else k
+        # y0*alpha^k rechtstreeks, niet y0 + (alpha^k - 1)*y0: dat valt weg bij uitdoven
+        ys = y0 * macht + som * beta
+        ys[0] = y0
 
-        def ODE(t, y):
-            return a * y + b
-        
-        t, y = 0.0, y0
-        ts, ys = [t], [y]
-        for _ in range(self.n):
-            # Eerste update
-            dydt1 = ODE(t, y)
-            t1 = t + 0.5 * self.delta_t
-            y1 = y + 0.5 * dydt1 * self.delta_t
-            # Tweede update
-            dydt2 = ODE(t1, y1)
-            t2 = t + 0.5 * self.delta_t
-            y2 = y + 0.5 * dydt2 * self.delta_t
-            # Derde update
-            dydt3 = ODE(t2, y2)
-            t3 = t + self.delta_t
-            y3 = y + dydt2 * self.delta_t
-            # Vierde update volgens Runge-Kutta
-            dydt4 = ODE(t3, y3)
-            t = t + self.delta_t
-            y = y + (dydt1 + 2.0 * dydt2 + 2.0 * dydt3 + dydt4) / 6.0 * self.delta_t
-            # Bewaar tussenresultaten
-            ts.append(t)
-            ys.append(y) 
-        return ts, ys
+        return self.tijdas().tolist(), ys.tolist()
 
 
     # To-do: verder afmaken...
@@ -328,6 +328,7 @@ class tumorODE:
         """
         Geef de lijst met tijdspunten en volume waarden die daar bijhoren om een grafiek te krijgen die deze plot. 
         """
+        from matplotlib import pyplot as plt
         plt.plot(Ts, Vs, color=color, label=label)
 
 
@@ -335,6 +336,7 @@ class tumorODE:
         """
         Weergeef de grafieken in een enkel venster:
         """
+        from matplotlib import pyplot as plt
         plt.gcf().set_size_inches(12.8, 4.8)
         plt.axvline(0.0, color='k')
         plt.xlabel("Tijd")
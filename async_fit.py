@@ -0,0 +1,174 @@
+import asyncio
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _fit_worker(modeler, model_naam, start_params, data_ts, data_vs, methode, annuleer, wachtrij, opties):
+    """Voer fit_and_evaluate uit in een worker en stuur de voortgang naar de wachtrij."""
+    model_func = getattr(modeler, model_naam)
+
+    def voortgang(iteratie, params, mse):
+        wachtrij.put((iteratie, params, mse))
+
+    try:
+        return modeler.fit_and_evaluate(model_func, start_params, data_ts, data_vs, methode=methode,
+                                        annuleer=annuleer, voortgang=voortgang, **opties)
+    finally:
+        # None markeert het einde van de voortgangsberichten
+        wachtrij.put(None)
+
+
+def _gedeelde_objecten(executor):
+    """
+    Maak een annuleer-event en voortgangswachtrij die de executor kunnen bereiken.
+
+    Threads delen gewoon geheugen; voor een ProcessPoolExecutor zijn proxies van
+    een multiprocessing.Manager nodig, die de aanroeper weer moet afsluiten.
+
+    Returns:
+        manager (None bij threads), event, wachtrij
+    """
+    if isinstance(executor, ProcessPoolExecutor):
+        manager = multiprocessing.Manager()
+        return manager, manager.Event(), manager.Queue()
+
+    return None, threading.Event(), queue.Queue()
+
+
+class FitTaak:
+    """
+    Een fit die in een executor loopt.
+
+    `await taak` geeft het resultaat van fit_and_evaluate, `async for iteratie, params, mse
+    in taak` levert de voortgang per iteratie en `taak.annuleer()` stopt de
+    hooke_jeeves-lus bij de volgende iteratie.
+
+    Bij een ProcessPoolExecutor heeft elke taak een eigen multiprocessing.Manager
+    voor het event en de wachtrij. Zodra de worker klaar is (ook na annuleren of
+    een fout) wordt de nog niet gelezen voortgang overgezet naar een gewone
+    wachtrij en de manager afgesloten.
+    """
+
+    def __init__(self, modeler, model_func, start_params, data_ts, data_vs, methode="rk4",
+                 executor=None, **opties):
+        self._loop = asyncio.get_running_loop()
+        self._manager, self._annuleer, self._wachtrij = _gedeelde_objecten(executor)
+        self._model_func = model_func
+        self._klaar = False
+        # Lezen en het overzetten van de wachtrij mogen niet door elkaar lopen
+        self._lezen = threading.Lock()
+
+        future = self._loop.run_in_executor(
+            executor, _fit_worker, modeler, model_func.__name__, dict(start_params),
+            list(data_ts), list(data_vs), methode, self._annuleer, self._wachtrij, opties)
+        if self._manager is not None:
+            future.add_done_callback(lambda _: self._loop.run_in_executor(None, self._sluit_manager))
+        self._future = asyncio.ensure_future(self._resultaat(future))
+
+    def _sluit_manager(self):
+        """Zet de resterende voortgang over naar een gewone wachtrij en sluit de manager af."""
+        with self._lezen:
+            lokaal = queue.Queue()
+            einde = False
+            try:
+                while True:
+                    bericht = self._wachtrij.get_nowait()
+                    einde = bericht is None
+                    lokaal.put(bericht)
+            except queue.Empty:
+                pass
+            if not einde:
+                # Bv. een worker die wegviel: de lezer mag niet eeuwig blijven wachten
+                lokaal.put(None)
+            self._wachtrij = lokaal
+        self._manager.shutdown()
+        self._annuleer = threading.Event()
+
+    async def _resultaat(self, future):
+        try:
+            res = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Laat de worker stoppen in plaats van hem door te laten rekenen
+            self.annuleer()
+            raise
+        # De functie in het resultaat hoort bij de modeler van de aanroeper (niet bij een kopie in een ander proces)
+        res["functie"] = self._model_func
+        return res
+
+    def annuleer(self):
+        """Vraag de fit om na de lopende iteratie te stoppen."""
+        self._annuleer.set()
+
+    def _lees(self):
+        """Volgend voortgangsbericht (blokkerend, draait in een thread)."""
+        while True:
+            # Met een timeout, zodat _sluit_manager tussendoor de wachtrij kan overzetten
+            with self._lezen:
+                try:
+                    return self._wachtrij.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+    def cancel(self):
+        """Annuleer de fit en de bijbehorende asyncio-taak."""
+        self.annuleer()
+        return self._future.cancel()
+
+    def __await__(self):
+        return self._future.__await__()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._klaar:
+            raise StopAsyncIteration
+        # Blokkerend lezen van de wachtrij gebeurt in een thread, niet in de event loop
+        bericht = await self._loop.run_in_executor(None, self._lees)
+        if bericht is None:
+            self._klaar = True
+            raise StopAsyncIteration
+        return bericht
+
+
+async def afit_and_evaluate(modeler, model_func, start_params, data_ts, data_vs, methode="rk4",
+                            executor=None, **opties):
+    """
+    Async variant van tumorODE.fit_and_evaluate die de event loop niet blokkeert.
+
+    Het rekenwerk loopt in de opgegeven executor (default de executor van de loop).
+    Wordt de aanroepende taak geannuleerd, dan stopt ook de optimalisatie tussen
+    twee iteraties. Voor voortgangsberichten: gebruik FitTaak direct.
+    """
+    taak = FitTaak(modeler, model_func, start_params, data_ts, data_vs, methode=methode,
+                   executor=executor, **opties)
+    try:
+        return await taak
+    except asyncio.CancelledError:
+        taak.cancel()
+        raise
+
+
+async def afit_all(modeler, modellen_lijst, data_ts, data_vs, methode="rk4", executor=None, **opties):
+    """
+    Fit een lijst (model_func, start_params) paren gelijktijdig.
+
+    De executor bepaalt hoeveel fits echt tegelijk rekenen, zodat veel verzoeken
+    dezelfde begrensde pool kunnen delen.
+
+    Returns:
+        lijst met resultaten van fit_and_evaluate, in dezelfde volgorde als modellen_lijst
+    """
+    taken = [
+        asyncio.ensure_future(afit_and_evaluate(modeler, model_func, start_params, data_ts, data_vs,
+                                                methode=methode, executor=executor, **opties))
+        for model_func, start_params in modellen_lijst
+    ]
+    try:
+        return await asyncio.gather(*taken)
+    except BaseException:
+        for taak in taken:
+            taak.cancel()
+        raise
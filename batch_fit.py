@@ -0,0 +1,246 @@
+import argparse
+import csv
+import itertools
+import json
+import math
+import sys
+
+from tumor_ODE import tumorODE
+from fitcache import FitCache
+from stopregels import Tijdslimiet
+from werkers import aantal_workers, verdeel
+
+# Startwaarden per model; V_max en V_min worden per tumor aan de data aangepast
+STANDAARD_START_PARAMS = {
+    "lineaire_model": {"c": 10},
+    "exponentieel_model": {"c": 0.01},
+    "mendelsohn_model": {"c": 0.5, "d": 0.8},
+    "logistisch_model": {"c": 0.02, "V_max": 800},
+    "gompertz_model": {"c": 0.02, "V_max": 800},
+    "von_bertalanffy_model": {"c": 0.5, "d": 0.1},
+    "exponentieel_afvlakkend_model": {"c": 0.01, "V_max": 800},
+    "allee_effect_model": {"c": 1e-5, "V_min": 10, "V_max": 800},
+    "lineair_gelimiteerd_model": {"c": 100, "d": 500},
+    "oppervlak_gelimiteerd_model": {"c": 1, "d": 10},
+}
+
+KOLOMMEN = ["tumor_id", "rang", "model_naam", "mse", "AIC", "AICc", "BIC", "best_params"]
+
+
+def start_params_voor(model_naam, data_vs):
+    """Startparameters voor een model, met V_max/V_min geschaald naar de meetdata."""
+    params = dict(STANDAARD_START_PARAMS[model_naam])
+    if "V_max" in params:
+        params["V_max"] = 2 * max(data_vs)
+    if "V_min" in params:
+        params["V_min"] = 0.5 * min(data_vs)
+    return params
+
+
+def lees_tumoren(pad):
+    """
+    Lees een long-format csv (tumor_id, t, volume) regel voor regel in.
+
+    Rijen van dezelfde tumor moeten aaneengesloten staan; er staat dus steeds maar
+    één tumor tegelijk in het geheugen. Dat wordt niet gecontroleerd (daarvoor
+    zouden alle eerdere id's bewaard moeten worden): een tumor waarvan de rijen
+    verspreid staan komt als meerdere tumoren met hetzelfde id terug.
+
+    Yields:
+        (tumor_id, ts, vs) per tumor, gesorteerd op t
+    """
+    with open(pad, newline="") as bestand:
+        lezer = csv.DictReader(bestand)
+        for tumor_id, rijen in itertools.groupby(lezer, key=lambda rij: rij["tumor_id"]):
+            punten = sorted((float(rij["t"]), float(rij["volume"])) for rij in rijen)
+            yield tumor_id, [t for t, _ in punten], [v for _, v in punten]
+
+
+def fit_tumor(tumor_id, data_ts, data_vs, model_namen, methode="rk4", delta_t=1.0,
+              optimizer="hooke_jeeves", criterium="AICc", cache=None, max_tijd=None, log_params=False):
+    """
+    Fit alle gekozen modellen op de data van één tumor en rangschik ze op het criterium.
+
+    De tijdas wordt verschoven zodat de eerste meting op t=0 ligt, met het eerste
+    gemeten volume als startvolume. Met cache (fitcache.FitCache) worden eerder
+    gedane fits op dezelfde data uit de cache gehaald. max_tijd (seconden) begrenst
+    de duur van elke modelfit; het beste resultaat tot dan toe telt. Met log_params
+    worden alle parameters in log-ruimte gezocht, zodat ze positief blijven.
+
+    Returns:
+        lijst met rijen (dicts met KOLOMMEN), beste model eerst
+    """
+    t0 = data_ts[0]
+    ts = [t - t0 for t in data_ts]
+    n = max(1, math.ceil(ts[-1] / delta_t))
+    modeler = tumorODE(volume=data_vs[0], delta_t=delta_t, n=n)
+
+    resultaten = []
+    for model_naam in model_namen:
+        model_func = getattr(modeler, model_naam)
+        opties = {"stoppen": [Tijdslimiet(max_tijd)]} if max_tijd is not None else {}
+        if log_params:
+            opties["transformaties"] = "log"
+        try:
+            res = modeler.fit_and_evaluate(model_func, start_params_voor(model_naam, data_vs),
+                                           ts, data_vs, methode=methode, optimizer=optimizer, cache=cache,
+                                           **opties)
+        except (ValueError, ZeroDivisionError, OverflowError) as fout:
+            print(f"Tumor {tumor_id}: {model_naam} overgeslagen ({fout})", file=sys.stderr)
+            continue
+        resultaten.append(res)
+
+    resultaten.sort(key=lambda res: res[criterium] if not math.isnan(res[criterium]) else math.inf)
+    return [
+        {
+            "tumor_id": tumor_id,
+            "rang": rang,
+            "model_naam": res["model_naam"],
+            "mse": float(res["mse"]),
+            "AIC": float(res["AIC"]),
+            "AICc": float(res["AICc"]),
+            "BIC": float(res["BIC"]),
+            "best_params": json.dumps({k: float(v) for k, v in res["best_params"].items()}),
+        }
+        for rang, res in enumerate(resultaten, start=1)
+    ]
+
+
+class CsvSchrijver:
+    """Schrijft resultaatrijen direct naar een csv-bestand."""
+
+    def __init__(self, pad):
+        self._bestand = open(pad, "w", newline="")
+        self._schrijver = csv.DictWriter(self._bestand, fieldnames=KOLOMMEN)
+        self._schrijver.writeheader()
+
+    def schrijf(self, rijen):
+        self._schrijver.writerows(rijen)
+        self._bestand.flush()
+
+    def sluit(self):
+        self._bestand.close()
+
+
+class ParquetSchrijver:
+    """Schrijft resultaatrijen als opeenvolgende row groups naar een Parquet-bestand (vereist pyarrow)."""
+
+    def __init__(self, pad):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Voor Parquet-uitvoer is pyarrow nodig: pip install pyarrow") from None
+        self._pa = pa
+        self._schema = pa.schema([
+            ("tumor_id", pa.string()), ("rang", pa.int32()), ("model_naam", pa.string()),
+            ("mse", pa.float64()), ("AIC", pa.float64()), ("AICc", pa.float64()),
+            ("BIC", pa.float64()), ("best_params", pa.string()),
+        ])
+        self._schrijver = pq.ParquetWriter(pad, self._schema)
+
+    def schrijf(self, rijen):
+        if rijen:
+            self._schrijver.write_table(self._pa.Table.from_pylist(rijen, schema=self._schema))
+
+    def sluit(self):
+        self._schrijver.close()
+
+
+def fit_cohort(invoer, uitvoer, model_namen, methode="rk4", delta_t=1.0, optimizer="hooke_jeeves",
+               criterium="AICc", n_workers=None, cache=None, max_tijd=None, log_params=False):
+    """
+    Fit een hele cohort uit een csv-bestand en schrijf de gerangschikte resultaten weg.
+
+    Tumoren worden één voor één ingelezen en over een procespool verdeeld. Er staan
+    nooit meer dan 2 * n_workers tumoren tegelijk uit, zodat het geheugengebruik
+    niet afhangt van de grootte van de cohort. Resultaten worden geschreven zodra
+    een tumor klaar is (dus niet per se in invoervolgorde).
+
+    Returns:
+        aantal verwerkte tumoren
+    """
+    n_workers = aantal_workers(n_workers)
+    schrijver = ParquetSchrijver(uitvoer) if uitvoer.endswith(".parquet") else CsvSchrijver(uitvoer)
+    aantal = 0
+
+    taken = ((tumor_id, ts, vs, model_namen, methode, delta_t, optimizer, criterium, cache, max_tijd, log_params)
+             for tumor_id, ts, vs in lees_tumoren(invoer))
+    try:
+        for rijen in verdeel(fit_tumor, taken, n_workers, max_lopend=2 * n_workers):
+            schrijver.schrijf(rijen)
+            aantal += 1
+    finally:
+        schrijver.sluit()
+
+    return aantal
+
+
+def main(argv=None):
+    """Command-line ingang: python -m tumor_ODE fit invoer.csv -o resultaten.csv"""
+    parser = argparse.ArgumentParser(prog="python -m tumor_ODE",
+                                     description="Tumorgroeimodellen fitten op een cohort.")
+    sub = parser.add_subparsers(dest="commando", required=True)
+
+    fit = sub.add_parser("fit", help="fit modellen per tumor uit een long-format csv (tumor_id, t, volume)")
+    fit.add_argument("invoer", help="csv met kolommen tumor_id, t, volume (per tumor aaneengesloten)")
+    fit.add_argument("-o", "--uitvoer", required=True, help="resultaten als .csv of .parquet")
+    fit.add_argument("-m", "--modellen", default=",".join(STANDAARD_START_PARAMS),
+                     help="komma-gescheiden modelnamen (default: alle modellen)")
+    fit.add_argument("--methode", default="rk4", choices=tumorODE.METHODES)
+    fit.add_argument("--delta-t", type=float, default=1.0, help="tijdstap van de simulatie")
+    fit.add_argument("--optimizer", default="hooke_jeeves", choices=["hooke_jeeves", "de"])
+    fit.add_argument("--criterium", default="AICc", choices=["AIC", "AICc", "BIC", "mse"],
+                     help="criterium voor de rangschikking")
+    fit.add_argument("-j", "--workers", type=int, default=None, help="aantal processen (default: alle cores)")
+    fit.add_argument("--cache", default=None, help="SQLite-bestand om fit-resultaten tussen runs te bewaren")
+    fit.add_argument("--max-tijd", type=float, default=None,
+                     help="maximale duur per modelfit in seconden (alleen hooke_jeeves)")
+    fit.add_argument("--log-params", action="store_true",
+                     help="zoek alle parameters in log-ruimte, zodat ze positief blijven (alleen hooke_jeeves)")
+
+    bench = sub.add_parser("benchmark", help="werk-precisie van alle modellen en integratiemethoden")
+    bench.add_argument("--delta-t", default="2,1,0.5,0.25,0.125,0.0625",
+                       help="komma-gescheiden ladder van tijdstappen")
+    bench.add_argument("--doel", type=float, default=1e-6, help="relatieve fout voor de aanbevolen methode")
+    bench.add_argument("--herhalingen", type=int, default=3, help="aantal tijdmetingen per combinatie")
+    bench.add_argument("--plot", default=None, help="sla de werk-precisiefiguur op (.png of .svg)")
+
+    args = parser.parse_args(argv)
+
+    if args.commando == "benchmark":
+        return benchmark_main(args)
+
+    model_namen = [naam.strip() for naam in args.modellen.split(",") if naam.strip()]
+    onbekend = [naam for naam in model_namen if naam not in STANDAARD_START_PARAMS]
+    if onbekend:
+        parser.error(f"onbekende modellen: {', '.join(onbekend)}")
+    if args.max_tijd is not None and args.optimizer != "hooke_jeeves":
+        parser.error("--max-tijd werkt alleen met --optimizer hooke_jeeves")
+    if args.log_params and args.optimizer != "hooke_jeeves":
+        parser.error("--log-params werkt alleen met --optimizer hooke_jeeves")
+
+    aantal = fit_cohort(args.invoer, args.uitvoer, model_namen, methode=args.methode,
+                        delta_t=args.delta_t, optimizer=args.optimizer,
+                        criterium=args.criterium, n_workers=args.workers,
+                        cache=FitCache(args.cache) if args.cache else None, max_tijd=args.max_tijd,
+                        log_params=args.log_params)
+    print(f"{aantal} tumoren gefit, resultaten in {args.uitvoer}")
+    return 0
+
+
+def benchmark_main(args):
+    """Voer de werk-precisiebenchmark uit en druk de tabel en de aanbevolen methode per model af."""
+    import benchmark
+
+    delta_ts = [float(dt) for dt in args.delta_t.split(",") if dt.strip()]
+    rijen = benchmark.werk_precisie(delta_ts=delta_ts, herhalingen=args.herhalingen)
+    print(benchmark.tabel(rijen))
+    print()
+    print(f"Goedkoopste methode met relatieve fout <= {args.doel:g}:")
+    for model_naam, rij in benchmark.beste_methode(rijen, args.doel).items():
+        keuze = f"{rij['methode']} (delta_t={rij['delta_t']:g})" if rij else "geen"
+        print(f"  {model_naam:<31} {keuze}")
+    if args.plot:
+        benchmark.plot_werk_precisie(rijen, args.plot)
+    return 0
@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class Behandelschema:
+    """
+    Een behandelschema: momentane doses, bolussen en tijdvensters met andere parameters.
+
+    De simulatie (tumorODE.simuleer_schema) knipt de tijdas op bij elk moment waarop
+    er iets verandert en integreert elk glad stuk met de gewone (grote) tijdstap; de
+    sprongen worden precies op de grenzen toegepast.
+
+    Voorbeeld:
+        schema = Behandelschema()
+        schema.dosis(10, overleving=0.6).dosis(17, overleving=0.6)   # bestraling
+        schema.venster(30, 45, c=0.005)                              # groeiremming tijdens chemo
+        Ts, Vs = testTumor.simuleer_schema(testTumor.gompertz_model, schema, c=0.02, V_max=8000)
+    """
+
+    def __init__(self):
+        self.doses = []      # (t, overleving, compartiment)
+        self.bolussen = []   # (t, hoeveelheid, compartiment)
+        self.vensters = []   # (t_start, t_eind, params)
+
+    def dosis(self, t, overleving, compartiment=None):
+        """
+        Momentane celdoding op tijdstip t: de toestand wordt met de overlevingsfractie vermenigvuldigd.
+
+        Parameters:
+            overleving (float): fractie die overleeft (tussen 0 en 1)
+            compartiment (int): bij een toestandsvector alleen dit compartiment,
+                                None is de hele toestand (bv. alle P/Q/N-cellen)
+        """
+        if not 0 <= overleving <= 1:
+            raise ValueError("De overlevingsfractie moet tussen 0 en 1 liggen.")
+        self.doses.append((float(t), float(overleving), compartiment))
+        return self
+
+    def bolus(self, t, hoeveelheid, compartiment=1):
+        """Tel op tijdstip t een hoeveelheid op bij een compartiment (bv. de concentratie van tumor_pk_model)."""
+        self.bolussen.append((float(t), float(hoeveelheid), compartiment))
+        return self
+
+    def venster(self, t_start, t_eind, **params):
+        """Gebruik op [t_start, t_eind) de opgegeven parameterwaarden in plaats van de basiswaarden."""
+        if t_eind <= t_start:
+            raise ValueError("Een venster moet eindigen na het begin.")
+        self.vensters.append((float(t_start), float(t_eind), params))
+        return self
+
+    def gebeurtenistijden(self):
+        """Alle tijdstippen waarop de toestand springt."""
+        return {t for t, _, _ in self.doses} | {t for t, _, _ in self.bolussen}
+
+    def breekpunten(self, t_eind, t0=0.0):
+        """Gesorteerde grenzen van de gladde stukken op [t0, t_eind], inclusief t0 en t_eind."""
+        tijden = self.gebeurtenistijden()
+        for t_start, t_stop, _ in self.vensters:
+            tijden |= {t_start, t_stop}
+        return [t0] + sorted(t for t in tijden if t0 < t < t_eind) + [t_eind]
+
+    def params_op(self, t):
+        """Parameterwaarden van de vensters die op tijdstip t actief zijn (latere vensters winnen)."""
+        actief = {}
+        for t_start, t_stop, params in self.vensters:
+            if t_start <= t < t_stop:
+                actief.update(params)
+        return actief
+
+    def sprong(self, t, Y):
+        """
+        Pas de doses en bolussen op tijdstip t toe op toestand Y (float of vector).
+
+        Returns:
+            de nieuwe toestand, of Y zelf als er op t niets gebeurt
+        """
+        if t not in self.gebeurtenistijden():
+            return Y
+        vector = np.ndim(Y) > 0
+        Y = np.array(Y, dtype=float) if vector else Y
+        for t_dosis, overleving, compartiment in self.doses:
+            if t_dosis != t:
+                continue
+            if compartiment is None:
+                Y = Y * overleving
+            elif vector:
+                Y[compartiment] *= overleving
+            else:
+                raise ValueError("Een compartiment kan alleen bij een model met toestandsvector.")
+        for t_bolus, hoeveelheid, compartiment in self.bolussen:
+            if t_bolus != t:
+                continue
+            if not vector:
+                raise ValueError("Een bolus kan alleen bij een model met toestandsvector.")
+            Y[compartiment] += hoeveelheid
+        return Y
+
+    def __repr__(self):
+        return (f"Behandelschema(doses={len(self.doses)}, bolussen={len(self.bolussen)}, "
+                f"vensters={len(self.vensters)})")
+
+
+def gezamenlijke_breekpunten(schemas, t_eind, t0=0.0):
+    """Vereniging van de breekpunten van meerdere schema's, voor gebatchte simulatie."""
+    tijden = set()
+    for schema in schemas:
+        tijden.update(schema.breekpunten(t_eind, t0))
+    return sorted(tijden)
@@ -0,0 +1,187 @@
+import math
+import time
+import numpy as np
+
+from tumor_ODE import tumorODE
+
+# Parameters per model die op de tijdschaal van de meetdata (t tot ~120, V0 ~250) realistisch groeien
+BENCHMARK_PARAMS = {
+    "lineaire_model": {"c": 30},
+    "exponentieel_model": {"c": 0.025},
+    "mendelsohn_model": {"c": 0.1, "d": 0.8},
+    "logistisch_model": {"c": 0.04, "V_max": 8000},
+    "gompertz_model": {"c": 0.02, "V_max": 8000},
+    "von_bertalanffy_model": {"c": 1.5, "d": 0.02},
+    "exponentieel_afvlakkend_model": {"c": 0.01, "V_max": 8000},
+    "allee_effect_model": {"c": 1e-5, "V_min": 10, "V_max": 8000},
+    "lineair_gelimiteerd_model": {"c": 50, "d": 500},
+    "oppervlak_gelimiteerd_model": {"c": 5, "d": 10},
+}
+
+# Exacte oplossingen V(t) met V(0) = V0, voor de modellen waar die bestaat
+ANALYTISCHE_OPLOSSINGEN = {
+    "lineaire_model": lambda t, V0, p: V0 + p["c"] * t,
+    "exponentieel_model": lambda t, V0, p: V0 * np.exp(p["c"] * t),
+    "exponentieel_afvlakkend_model": lambda t, V0, p: p["V_max"] - (p["V_max"] - V0) * np.exp(-p["c"] * t),
+    "logistisch_model": lambda t, V0, p: p["V_max"] / (1 + (p["V_max"] / V0 - 1) * np.exp(-p["c"] * t)),
+    "gompertz_model": lambda t, V0, p: p["V_max"] * np.exp(np.log(V0 / p["V_max"]) * np.exp(-p["c"] * t)),
+    # u = V^(1/3) voldoet aan du/dt = c/3 - d/3 * u
+    "von_bertalanffy_model": lambda t, V0, p: (p["c"] / p["d"] + (V0 ** (1/3) - p["c"] / p["d"])
+                                               * np.exp(-p["d"] * t / 3)) ** 3,
+}
+
+
+def _referentie(model_naam, params, Ts, V0, dt_ref):
+    """Referentievolumes op de tijdstippen Ts: analytisch, of RK4 met een veel kleinere stap."""
+    if model_naam in ANALYTISCHE_OPLOSSINGEN:
+        return ANALYTISCHE_OPLOSSINGEN[model_naam](np.asarray(Ts), V0, params), "analytisch"
+
+    n_ref = int(round(Ts[-1] / dt_ref))
+    modeler = tumorODE(V0, dt_ref, n_ref)
+    _, Vs_ref = getattr(modeler, model_naam)(methode="rk4", **params)
+    indices = np.rint(np.asarray(Ts) / dt_ref).astype(int)
+    return np.asarray(Vs_ref)[indices], "rk4"
+
+
+def werk_precisie(modellen=None, methodes=None, delta_ts=(2, 1, 0.5, 0.25, 0.125, 0.0625), t_eind=120,
+                  V0=250.0, herhalingen=3, ref_factor=16):
+    """
+    Meet fout en rekentijd van elke combinatie model x integratiemethode x delta_t.
+
+    De fout is de grootste relatieve afwijking over alle tijdstappen ten opzichte
+    van de analytische oplossing (ANALYTISCHE_OPLOSSINGEN) of, als die er niet is,
+    van een RK4-referentie met delta_t = min(delta_ts) / ref_factor. De tijd is
+    de snelste van herhalingen simulaties.
+
+    Parameters:
+        modellen (dict): model_naam -> params, default BENCHMARK_PARAMS
+        methodes: integratiemethoden, default alle uit tumorODE.METHODES
+        delta_ts: ladder van tijdstappen (t_eind moet een veelvoud zijn)
+
+    Returns:
+        lijst met dicts (model_naam, methode, delta_t, fout, tijd, referentie)
+    """
+    modellen = BENCHMARK_PARAMS if modellen is None else modellen
+    methodes = tumorODE.METHODES if methodes is None else methodes
+    dt_ref = min(delta_ts) / ref_factor
+
+    rijen = []
+    for model_naam, params in modellen.items():
+        for delta_t in delta_ts:
+            n = int(round(t_eind / delta_t))
+            modeler = tumorODE(V0, delta_t, n)
+            model_func = getattr(modeler, model_naam)
+            referentie = None
+
+            for methode in methodes:
+                tijden = []
+                for _ in range(herhalingen):
+                    start = time.perf_counter()
+                    Ts, Vs = model_func(methode=methode, **params)
+                    tijden.append(time.perf_counter() - start)
+
+                if referentie is None:
+                    referentie, soort = _referentie(model_naam, params, Ts, V0, dt_ref)
+                schaal = np.maximum(np.abs(referentie), 1e-12)
+                with np.errstate(all="ignore"):
+                    fout = float(np.max(np.abs(np.asarray(Vs) - referentie) / schaal))
+
+                rijen.append({
+                    "model_naam": model_naam,
+                    "methode": methode,
+                    "delta_t": delta_t,
+                    "fout": fout if math.isfinite(fout) else math.inf,
+                    "tijd": min(tijden),
+                    "referentie": soort
+                })
+    return rijen
+
+
+def convergentie_orde(rijen, ondergrens=1e-12):
+    """
+    Geschatte convergentieorde per (model, methode): helling van log(fout) tegen log(delta_t).
+
+    Fouten onder de ondergrens (afrondingsruis, of een methode die het model
+    exact oplost) en oneindige fouten tellen niet mee.
+
+    Returns:
+        dict (model_naam, methode) -> orde (NaN bij minder dan twee bruikbare punten)
+    """
+    groepen = {}
+    for rij in rijen:
+        groepen.setdefault((rij["model_naam"], rij["methode"]), []).append(rij)
+
+    ordes = {}
+    for sleutel, groep in groepen.items():
+        punten = [(r["delta_t"], r["fout"]) for r in groep if ondergrens < r["fout"] < math.inf]
+        if len(punten) < 2:
+            ordes[sleutel] = math.nan
+            continue
+        dts, fouten = zip(*punten)
+        ordes[sleutel] = float(np.polyfit(np.log(dts), np.log(fouten), 1)[0])
+    return ordes
+
+
+def beste_methode(rijen, doel=1e-6):
+    """
+    Per model de goedkoopste (methode, delta_t) die de relatieve fout onder doel brengt.
+
+    Returns:
+        dict model_naam -> rij uit werk_precisie (None als niets het doel haalt)
+    """
+    beste = {}
+    for rij in rijen:
+        naam = rij["model_naam"]
+        beste.setdefault(naam, None)
+        if rij["fout"] <= doel and (beste[naam] is None or rij["tijd"] < beste[naam]["tijd"]):
+            beste[naam] = rij
+    return beste
+
+
+def tabel(rijen, ordes=None):
+    """Werk-precisietabel als tekst, met de convergentieorde per model/methode."""
+    ordes = convergentie_orde(rijen) if ordes is None else ordes
+    regels = [f"{'model':<31} {'methode':<8} {'delta_t':>8} {'fout':>10} {'tijd (ms)':>10} {'orde':>6}"]
+    for rij in rijen:
+        orde = ordes.get((rij["model_naam"], rij["methode"]), math.nan)
+        regels.append(f"{rij['model_naam']:<31} {rij['methode']:<8} {rij['delta_t']:>8.4g} "
+                      f"{rij['fout']:>10.2e} {1000 * rij['tijd']:>10.3f} {orde:>6.2f}")
+    return "\n".join(regels)
+
+
+def plot_werk_precisie(rijen, pad=None, kolommen=3):
+    """
+    Teken per model fout tegen rekentijd (log-log), één lijn per integratiemethode.
+
+    Met pad wordt de figuur opgeslagen (png of svg, zie plotten.opslaan).
+
+    Returns:
+        de matplotlib Figure
+    """
+    from matplotlib.figure import Figure
+    from plotten import opslaan
+
+    namen = list(dict.fromkeys(rij["model_naam"] for rij in rijen))
+    methodes = list(dict.fromkeys(rij["methode"] for rij in rijen))
+    regels = math.ceil(len(namen) / kolommen)
+
+    fig = Figure(figsize=(4 * kolommen, 3.2 * regels))
+    for i, naam in enumerate(namen):
+        ax = fig.add_subplot(regels, kolommen, i + 1)
+        for j, methode in enumerate(methodes):
+            punten = [(r["tijd"], r["fout"]) for r in rijen
+                      if r["model_naam"] == naam and r["methode"] == methode and 0 < r["fout"] < math.inf]
+            if punten:
+                tijden, fouten = zip(*punten)
+                ax.loglog(tijden, fouten, marker="o", color=f"C{j}", label=methode)
+        ax.set_title(naam, fontsize=9)
+        ax.set_xlabel("tijd (s)")
+        ax.set_ylabel("relatieve fout")
+        ax.grid(True, which="both", alpha=0.3)
+        if ax.lines:
+            ax.legend(fontsize=7)
+    fig.tight_layout()
+
+    if pad is not None:
+        opslaan(fig, pad)
+    return fig
@@ -0,0 +1,132 @@
+import contextlib
+import hashlib
+import json
+import sqlite3
+import time
+import numpy as np
+
+from tumor_ODE import __version__
+
+# Opties die de uitkomst van een fit niet veranderen en dus niet in de sleutel horen
+_NIET_IN_SLEUTEL = {"voortgang", "checkpoint", "checkpoint_elke", "checkpoint_extra"}
+# Opties waarmee een fit niet reproduceerbaar is (afgebroken, hervat of vroeg gestopt): niet cachen
+_NIET_CACHEN = {"annuleer", "resume", "terugroep", "stoppen"}
+
+
+def _json_waarde(waarde):
+    """Zet numpy-getallen en -arrays om naar iets wat json kan wegschrijven."""
+    if isinstance(waarde, np.ndarray):
+        return waarde.tolist()
+    if isinstance(waarde, np.generic):
+        return waarde.item()
+    raise TypeError(f"Niet in de cache-sleutel op te nemen: {type(waarde).__name__}")
+
+
+class FitCache:
+    """
+    Persistente cache van fit-resultaten in een SQLite-bestand.
+
+    De sleutel is een sha256-hash van de modelnaam, de startparameters, de
+    optimizer met zijn opties, de integratiemethode, delta_t, n, het startvolume
+    en de meetdata (bit-exact). Een identieke fit_and_evaluate-aanroep (met
+    cache=...) komt dan direct uit de cache, ook in een latere sessie.
+
+    Bij een andere __version__ van de bibliotheek wordt de hele cache bij het
+    openen geleegd. Gaat de totale grootte boven max_bytes, dan worden de
+    langst niet gebruikte resultaten verwijderd. Er wordt per bewerking een
+    verbinding geopend, zodat het object ook naar workers kan (pickle) en meerdere
+    processen dezelfde cache kunnen delen.
+    """
+
+    def __init__(self, pad, max_bytes=64 * 2**20):
+        """
+        Parameters:
+            pad (str): pad naar het SQLite-bestand (wordt aangemaakt als het niet bestaat)
+            max_bytes (int): maximale totale grootte van de opgeslagen resultaten
+        """
+        self.pad = pad
+        self.max_bytes = max_bytes
+        with self._verbind() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS meta (sleutel TEXT PRIMARY KEY, waarde TEXT)")
+            db.execute("CREATE TABLE IF NOT EXISTS fits (sleutel TEXT PRIMARY KEY, resultaat TEXT, "
+                       "grootte INTEGER, gebruikt REAL)")
+            rij = db.execute("SELECT waarde FROM meta WHERE sleutel = 'versie'").fetchone()
+            if rij is None or rij[0] != __version__:
+                db.execute("DELETE FROM fits")
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('versie', ?)", (__version__,))
+
+    @contextlib.contextmanager
+    def _verbind(self):
+        """Verbinding voor één bewerking: commit (of rollback bij een fout) en sluit daarna."""
+        db = sqlite3.connect(self.pad, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def sleutel(self, modeler, model_naam, start_params, data_ts, data_vs, methode, optimizer, opties):
+        """
+        Hash van alles wat de uitkomst van de fit bepaalt.
+
+        Returns:
+            hex-string, of None als de fit niet te cachen is (afgebroken/hervat/gestopt,
+            een gerandomiseerde optimizer zonder seed, of opties die niet in json passen)
+        """
+        if _NIET_CACHEN & set(opties):
+            return None
+        if optimizer != "hooke_jeeves" and opties.get("seed") is None:
+            return None
+        inhoud = {
+            "versie": __version__,
+            "model": model_naam,
+            "start_params": dict(sorted(start_params.items())),
+            "optimizer": optimizer,
+            "opties": {k: v for k, v in sorted(opties.items()) if k not in _NIET_IN_SLEUTEL},
+            "methode": methode,
+            "delta_t": modeler.delta_t,
+            "n": modeler.n,
+            "start_volume": modeler.start_volume,
+        }
+        try:
+            tekst = json.dumps(inhoud, default=_json_waarde, sort_keys=True)
+        except TypeError:
+            return None
+        h = hashlib.sha256(tekst.encode())
+        h.update(np.asarray(data_ts, dtype=np.float64).tobytes())
+        h.update(b"|")
+        h.update(np.asarray(data_vs, dtype=np.float64).tobytes())
+        return h.hexdigest()
+
+    def haal(self, sleutel):
+        """Het opgeslagen resultaat (dict zonder 'functie'), of None."""
+        with self._verbind() as db:
+            rij = db.execute("SELECT resultaat FROM fits WHERE sleutel = ?", (sleutel,)).fetchone()
+            if rij is None:
+                return None
+            db.execute("UPDATE fits SET gebruikt = ? WHERE sleutel = ?", (time.time(), sleutel))
+        return json.loads(rij[0])
+
+    def bewaar(self, sleutel, resultaat):
+        """Sla een resultaat van fit_and_evaluate op en verwijder zo nodig de oudste resultaten."""
+        tekst = json.dumps({k: v for k, v in resultaat.items() if k != "functie"}, default=_json_waarde)
+        with self._verbind() as db:
+            db.execute("INSERT OR REPLACE INTO fits VALUES (?, ?, ?, ?)",
+                       (sleutel, tekst, len(tekst), time.time()))
+            totaal = db.execute("SELECT COALESCE(SUM(grootte), 0) FROM fits").fetchone()[0]
+            if totaal > self.max_bytes:
+                for oud, grootte in db.execute("SELECT sleutel, grootte FROM fits ORDER BY gebruikt").fetchall():
+                    if totaal <= self.max_bytes:
+                        break
+                    db.execute("DELETE FROM fits WHERE sleutel = ?", (oud,))
+                    totaal -= grootte
+
+    def leeg(self):
+        """Verwijder alle opgeslagen resultaten."""
+        with self._verbind() as db:
+            db.execute("DELETE FROM fits")
+
+    def __len__(self):
+        with self._verbind() as db:
+            return db.execute("SELECT COUNT(*) FROM fits").fetchone()[0]
+
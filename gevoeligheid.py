@@ -0,0 +1,197 @@
+import numpy as np
+
+from sweep import chunk_grootte
+from werkers import aantal_workers, verdeel
+
+
+def eind_volume(Ts, Vs):
+    """Uitvoergrootheid: het volume na de laatste stap, per parameterset."""
+    return Vs[-1]
+
+
+class TijdTotDrempel:
+    """
+    Uitvoergrootheid: eerste tijdstip waarop het volume de drempel bereikt (lineair geïnterpoleerd).
+
+    Sets die de drempel binnen de horizon niet halen krijgen de eindtijd van de simulatie.
+    """
+
+    def __init__(self, drempel):
+        self.drempel = drempel
+
+    def __call__(self, Ts, Vs):
+        boven = Vs >= self.drempel
+        bereikt = boven.any(axis=0)
+        i = np.where(bereikt, np.argmax(boven, axis=0), len(Ts) - 1)
+        vorige = np.maximum(i - 1, 0)
+        kolommen = np.arange(Vs.shape[1])
+        V0, V1 = Vs[vorige, kolommen], Vs[i, kolommen]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w = np.where(V1 > V0, (self.drempel - V0) / (V1 - V0), 0.0)
+        t = Ts[vorige] + np.clip(w, 0.0, 1.0) * (Ts[i] - Ts[vorige])
+        return np.where(bereikt, t, Ts[-1])
+
+
+def _evalueer_chunk(modeler, model_naam, methode, namen, X, vaste_params, uitvoer, start):
+    """Simuleer de parametersets in X (rijen, eenheidskubus al omgezet) en bereken de uitvoer (draait in een worker)."""
+    params = {naam: X[:, j] for j, naam in enumerate(namen)}
+    params.update(vaste_params)
+    Ts, Vs = modeler.simuleer_batch(model_naam, params, methode)
+    Vs = modeler.volume(model_naam, Vs)
+    with np.errstate(all="ignore"):
+        return start, np.asarray(uitvoer(Ts, Vs), dtype=float)
+
+
+def evalueer(modeler, model_func, X, namen, vaste_params=None, uitvoer=eind_volume, methode="rk4",
+             max_geheugen=512 * 2**20, n_workers=None):
+    """
+    Bereken de uitvoer voor alle rijen van X met gebatchte simulaties, in chunks over meerdere processen.
+
+    Parameters:
+        X (np.ndarray): parameterwaarden, vorm (m, len(namen))
+        namen: parameternamen bij de kolommen van X
+        uitvoer (callable): uitvoer(Ts, Vs) -> array met één waarde per kolom van Vs
+                            (op module-niveau, zodat hij naar de workers kan)
+
+    Returns:
+        np.ndarray met vorm (m,)
+    """
+    naam = model_func if isinstance(model_func, str) else model_func.__name__
+    vaste_params = dict(vaste_params or {})
+    n_workers = aantal_workers(n_workers)
+    # Elke set heeft een waarde in de len(namen) kolommen van X en in elke vaste parameter
+    chunk = chunk_grootte(modeler, 0, max_geheugen, n_workers, d=modeler.toestand_dimensie(naam),
+                          n_kolommen=X.shape[1] + len(vaste_params))
+    y = np.empty(len(X))
+    taken = ((modeler, naam, methode, namen, X[start:start + chunk], vaste_params, uitvoer, start)
+             for start in range(0, len(X), chunk))
+    for start, waarden in verdeel(_evalueer_chunk, taken, n_workers):
+        y[start:start + len(waarden)] = waarden
+    return y
+
+
+def _schaal(U, grenzen):
+    """Zet punten uit de eenheidskubus om naar de parametergrenzen."""
+    laag = np.array([g[0] for g in grenzen.values()], dtype=float)
+    hoog = np.array([g[1] for g in grenzen.values()], dtype=float)
+    return laag + U * (hoog - laag)
+
+
+def _sobol_indices(fA, fB, fAB):
+    """S1 (Saltelli 2010) en ST (Jansen) uit de uitvoer van A, B en de k matrices AB_i."""
+    # Centreren verandert de verwachting niet, maar verkleint de variantie van S1 flink
+    # als het gemiddelde groot is ten opzichte van de spreiding (zoals bij volumes)
+    gemiddelde = np.mean(np.concatenate([fA, fB]))
+    fA, fB, fAB = fA - gemiddelde, fB - gemiddelde, fAB - gemiddelde
+    var = np.var(np.concatenate([fA, fB]))
+    S1 = np.mean(fB[:, None] * (fAB - fA[:, None]), axis=0) / var
+    ST = 0.5 * np.mean((fA[:, None] - fAB) ** 2, axis=0) / var
+    return S1, ST
+
+
+def sobol(modeler, model_func, grenzen, N=4096, vaste_params=None, uitvoer=eind_volume, methode="rk4",
+          n_bootstrap=500, betrouwbaarheid=0.95, seed=None, **opties):
+    """
+    Variantie-gebaseerde gevoeligheidsindices (Sobol) met het Saltelli-schema.
+
+    Er worden twee onafhankelijke steekproeven A en B (N x k, uniform binnen de
+    grenzen) getrokken en k matrices AB_i (A met kolom i uit B): N * (k + 2)
+    simulaties, die in één keer gebatcht en over de cores verdeeld worden (zie
+    evalueer). Rijen waarvan een van de simulaties geen eindige uitvoer geeft,
+    tellen niet mee. Betrouwbaarheidsintervallen komen uit een bootstrap over de N rijen.
+
+    Parameters:
+        grenzen (dict): parameter -> (ondergrens, bovengrens), de te onderzoeken parameters
+        N (int): basisgrootte van de steekproef
+        vaste_params (dict): waarden voor de overige parameters van het model
+        uitvoer (callable): bv. eind_volume of TijdTotDrempel(drempel)
+        opties: max_geheugen en n_workers voor evalueer
+
+    Returns:
+        dict met 'param_namen', 'S1', 'ST' (arrays met één index per parameter),
+        'S1_interval' en 'ST_interval' (vorm (k, 2)), 'N' (gebruikte rijen) en 'n_simulaties'
+    """
+    namen = list(grenzen)
+    k = len(namen)
+    rng = np.random.default_rng(seed)
+    A = rng.random((N, k))
+    B = rng.random((N, k))
+    AB = np.repeat(A[None], k, axis=0)
+    for i in range(k):
+        AB[i, :, i] = B[:, i]
+
+    U = np.concatenate([A, B, AB.reshape(k * N, k)])
+    y = evalueer(modeler, model_func, _schaal(U, grenzen), namen, vaste_params, uitvoer, methode, **opties)
+    fA, fB, fAB = y[:N], y[N:2 * N], y[2 * N:].reshape(k, N).T
+
+    geldig = np.isfinite(fA) & np.isfinite(fB) & np.isfinite(fAB).all(axis=1)
+    fA, fB, fAB = fA[geldig], fB[geldig], fAB[geldig]
+    S1, ST = _sobol_indices(fA, fB, fAB)
+
+    n = len(fA)
+    S1_boot = np.empty((n_bootstrap, k))
+    ST_boot = np.empty((n_bootstrap, k))
+    for b in range(n_bootstrap):
+        rijen = rng.integers(0, n, n)
+        S1_boot[b], ST_boot[b] = _sobol_indices(fA[rijen], fB[rijen], fAB[rijen])
+    grens = 100 * np.array([(1 - betrouwbaarheid) / 2, (1 + betrouwbaarheid) / 2])
+
+    return {
+        "param_namen": namen,
+        "S1": S1,
+        "ST": ST,
+        "S1_interval": np.percentile(S1_boot, grens, axis=0).T,
+        "ST_interval": np.percentile(ST_boot, grens, axis=0).T,
+        "N": n,
+        "n_simulaties": len(U)
+    }
+
+
+def morris(modeler, model_func, grenzen, r=100, niveaus=4, vaste_params=None, uitvoer=eind_volume,
+           methode="rk4", n_bootstrap=500, betrouwbaarheid=0.95, seed=None, **opties):
+    """
+    Morris-screening (elementaire effecten): goedkoop onderscheid tussen parameters die ertoe doen en die niet.
+
+    Elk van de r trajecten start op een willekeurig roosterpunt (niveaus per as) en
+    verhoogt de parameters in willekeurige volgorde één voor één met
+    delta = niveaus / (2 * (niveaus - 1)) van het bereik: r * (k + 1) simulaties,
+    gebatcht zoals bij sobol.
+
+    Returns:
+        dict met 'param_namen', 'mu', 'mu_ster' (gemiddelde absolute effect),
+        'sigma' (spreiding, duidt op interactie of niet-lineariteit),
+        'mu_ster_interval' (bootstrap over de trajecten), 'r' (bruikbare trajecten) en 'n_simulaties'
+    """
+    namen = list(grenzen)
+    k = len(namen)
+    rng = np.random.default_rng(seed)
+    delta = niveaus / (2 * (niveaus - 1))
+
+    # Startpunten op de onderste helft van het rooster, zodat x + delta binnen [0, 1] blijft
+    start = rng.integers(0, niveaus // 2, (r, k)) / (niveaus - 1)
+    volgordes = np.argsort(rng.random((r, k)), axis=1)
+    U = np.repeat(start[:, None, :], k + 1, axis=1)
+    for stap in range(k):
+        kolom = volgordes[:, stap]
+        U[np.arange(r), stap + 1:, kolom] += delta
+
+    y = evalueer(modeler, model_func, _schaal(U.reshape(r * (k + 1), k), grenzen), namen, vaste_params,
+                 uitvoer, methode, **opties).reshape(r, k + 1)
+
+    effecten = np.empty((r, k))
+    effecten[np.arange(r)[:, None], volgordes] = np.diff(y, axis=1) / delta
+    effecten = effecten[np.isfinite(effecten).all(axis=1)]
+
+    n = len(effecten)
+    boot = np.array([np.abs(effecten[rng.integers(0, n, n)]).mean(axis=0) for _ in range(n_bootstrap)])
+    grens = 100 * np.array([(1 - betrouwbaarheid) / 2, (1 + betrouwbaarheid) / 2])
+
+    return {
+        "param_namen": namen,
+        "mu": effecten.mean(axis=0),
+        "mu_ster": np.abs(effecten).mean(axis=0),
+        "sigma": effecten.std(axis=0, ddof=1),
+        "mu_ster_interval": np.percentile(boot, grens, axis=0).T,
+        "r": n,
+        "n_simulaties": r * (k + 1)
+    }
@@ -0,0 +1,136 @@
+import math
+import numpy as np
+
+from tumor_ODE import tumorODE
+
+
+class IncrementeleFit:
+    """
+    Houdt per model het laatste optimum en het bijbehorende traject bij en fit bij
+    een nieuwe meting opnieuw, met het vorige optimum als warme start.
+
+    Bij elke update:
+        - start hooke_jeeves vanuit het vorige optimum met kleine stappen (warme start);
+          de winst zit in die kortere zoektocht, want de MSE-evaluaties van de fit
+          simuleren elk het hele traject;
+        - loopt er ook een koude start vanaf de oorspronkelijke startparameters, want
+          met de nieuwe data kan het vorige optimum in een ander (slechter) lokaal
+          minimum liggen; het beste van de twee wordt bewaard. Met koude_start=False
+          wordt de koude start alleen gedaan als de warme fit slechter eindigt dan
+          de startparameters;
+        - wordt de MSE van het vorige optimum op de uitgebreide data bepaald door
+          zijn gecachte traject te verlengen over de nieuwe tijdstappen;
+        - wordt de rangschikking op AIC/AICc/BIC bijgewerkt.
+
+    Voorbeeld:
+        fit = IncrementeleFit([("gompertz_model", {"c": 0.02, "V_max": 8000})], delta_t=1)
+        ranking = fit.update(data_ts, data_vs)
+    """
+
+    def __init__(self, modellen_lijst, delta_t=1.0, methode="rk4", criterium="AICc",
+                 warm_delta_schaal=0.01, koude_start=True, **hj_opties):
+        """
+        Parameters:
+            modellen_lijst: lijst met (model_naam, start_params) paren
+            delta_t (float): tijdstap van de simulatie
+            methode (str): integratiemethode
+            criterium (str): 'AIC', 'AICc', 'BIC' of 'mse' voor de rangschikking
+            warm_delta_schaal (float): relatieve beginstap van hooke_jeeves bij een warme start
+            koude_start (bool): bij elke update ook vanaf de startparameters fitten
+                                (anders alleen als de warme fit slechter is dan die)
+            hj_opties: extra opties voor hooke_jeeves (tol, max_iter, ...)
+        """
+        self.modellen = [(naam, dict(params)) for naam, params in modellen_lijst]
+        self.delta_t = delta_t
+        self.methode = methode
+        self.criterium = criterium
+        self.warm_delta_schaal = warm_delta_schaal
+        self.koude_start = koude_start
+        self.hj_opties = hj_opties
+
+        self.modeler = None
+        self.resultaten = {}
+        self._trajecten = {}
+
+    def _traject(self, model_naam, params, n):
+        """Traject van een model tot stap n, verlengd vanuit de cache als de parameters gelijk zijn."""
+        model_func = getattr(self.modeler, model_naam)
+        cache = self._trajecten.get(model_naam)
+
+        # Een model met vertraging is niet te verlengen vanuit alleen de laatste toestand
+        verlengbaar = not self.modeler.heeft_vertraging(model_naam)
+        if verlengbaar and cache is not None and cache[0] == params and len(cache[1]) - 1 <= n:
+            _, Ts, Vs = cache
+            extra = n - (len(Ts) - 1)
+            if extra > 0:
+                nieuw_ts, nieuw_vs = self.modeler.verleng(model_func, params, Vs[-1], Ts[-1], extra, self.methode)
+                Ts = Ts + nieuw_ts[1:]
+                Vs = Vs + nieuw_vs[1:]
+        else:
+            Ts, Vs = model_func(methode=self.methode, **params)
+
+        self._trajecten[model_naam] = (dict(params), Ts, Vs)
+        return Ts, Vs
+
+    def update(self, data_ts, data_vs):
+        """
+        Verwerk de (uitgebreide) meetreeks en fit alle modellen opnieuw.
+
+        data_ts en data_vs zijn de volledige reeksen tot nu toe; de eerste meting
+        ligt op t=0 en levert het startvolume.
+
+        Returns:
+            lijst met resultaten (zoals fit_and_evaluate), beste model eerst
+        """
+        n = max(1, math.ceil(data_ts[-1] / self.delta_t))
+        if self.modeler is None or self.modeler.start_volume != data_vs[0]:
+            self.modeler = tumorODE(volume=data_vs[0], delta_t=self.delta_t, n=n)
+            self._trajecten = {}
+            self.resultaten = {}
+        self.modeler.n = n
+
+        n_data = len(data_vs)
+        for model_naam, start_params in self.modellen:
+            model_func = getattr(self.modeler, model_naam)
+            vorige = self.resultaten.get(model_naam)
+
+            koud = vorige is None
+            if not koud:
+                warm = dict(vorige["best_params"])
+                Ts, Vs = self._traject(model_naam, warm, n)
+                warm_mse = np.mean((np.array(data_vs) - np.interp(data_ts, Ts, Vs)) ** 2)
+                params, mse = self.modeler.hooke_jeeves(model_func, warm, data_ts, data_vs, methode=self.methode,
+                                                        delta_schaal=self.warm_delta_schaal, start_mse=warm_mse,
+                                                        **self.hj_opties)
+                koud = self.koude_start or not mse <= self.modeler.MSE(model_func, self.methode, start_params,
+                                                                        data_ts, data_vs)
+            if koud:
+                koude_params, koude_mse = self.modeler.hooke_jeeves(model_func, dict(start_params), data_ts,
+                                                                    data_vs, methode=self.methode, **self.hj_opties)
+                if vorige is None or koude_mse < mse:
+                    params, mse = koude_params, koude_mse
+
+            # Het traject van het nieuwe optimum is het prefix dat de volgende update verlengt
+            self._traject(model_naam, params, n)
+
+            aic, aicc, bic = self.modeler.informatie_criteria(mse, n_data, len(params))
+            self.resultaten[model_naam] = {
+                "model_naam": model_naam,
+                "functie": model_func,
+                "best_params": params,
+                "mse": mse,
+                "AIC": aic,
+                "AICc": aicc,
+                "BIC": bic
+            }
+
+        return self.ranking()
+
+    def ranking(self):
+        """Huidige resultaten gesorteerd op het gekozen criterium (laagste eerst)."""
+        return sorted(self.resultaten.values(),
+                      key=lambda res: res[self.criterium] if not np.isnan(res[self.criterium]) else np.inf)
+
+    def traject(self, model_naam):
+        """Ts, Vs van het huidige optimum van een model (uit de cache waar mogelijk)."""
+        return self._traject(model_naam, self.resultaten[model_naam]["best_params"], self.modeler.n)
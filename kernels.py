@@ -0,0 +1,167 @@
+import math
+import re
+
+# Rechterlid per model als Python-expressie in {V}, met de parameters in volgorde. De
+# expressies zijn letterlijk die uit de modelmethoden van tumorODE, zodat een kernel
+# bit-voor-bit dezelfde getallen oplevert als _simulate met de lambda.
+KERNEL_RHS = {
+    "lineaire_model": (("c",), "c"),
+    "exponentieel_model": (("c",), "c * {V}"),
+    "mendelsohn_model": (("c", "d"), "c * _pow(_max(1e-6, {V}), d)"),
+    "logistisch_model": (("c", "V_max"), "c * {V} * (1 - {V}/V_max)"),
+    "gompertz_model": (("c", "V_max"), "c * {V} * _log(V_max / {V}) if {V} > 1e-9 else 0"),
+    "von_bertalanffy_model": (("c", "d"), "c * _pow(_max(0, {V}), 2/3) - d * {V}"),
+    "exponentieel_afvlakkend_model": (("c", "V_max"), "c * (V_max - {V})"),
+    "allee_effect_model": (("c", "V_min", "V_max"), "c * ({V} - V_min) * (V_max - {V})"),
+    "lineair_gelimiteerd_model": (("c", "d"), "c * ({V} / ({V} + d))"),
+    "oppervlak_gelimiteerd_model": (("c", "d"), "c * {V} / _pow(({V} + d), 1/3)"),
+}
+
+# Modellen met een toestandsvector: parameters, namen van de componenten en per
+# component het rechterlid in die namen, letterlijk zoals in _tumor_pk_rhs en _pqn_rhs
+# van tumor_ODE. Elke component wordt een eigen float in de lus.
+KERNEL_SYSTEMEN = {
+    "tumor_pk_model": (("c", "V_max", "k_el", "e_max", "EC50", "k12", "k21"), ("V", "C", "C_p"), (
+        "c * {V} * (1 - {V}/V_max) - e_max * {C} / (EC50 + {C}) * {V}",
+        "-(k_el + k12) * {C} + k21 * {C_p}",
+        "k12 * {C} - k21 * {C_p}",
+    )),
+    "pqn_model": (("c", "V_max", "k_pq", "k_qn", "k_opruim"), ("P", "Q", "N"), (
+        "c * {P} * (1 - ({P} + {Q} + {N})/V_max) - k_pq * {P}",
+        "k_pq * {P} - k_qn * {Q}",
+        "k_qn * {Q} - k_opruim * {N}",
+    )),
+}
+
+# Eén stap per methode; {f:X} wordt vervangen door het rechterlid in variabele X
+_STAPPEN = {
+    "euler": [
+        "V = V + ({f:V}) * dt",
+    ],
+    "heun": [
+        "k1 = {f:V}",
+        "W = V + k1*dt",
+        "k2 = {f:W}",
+        "V = V + 0.5 * (k1 + k2) * dt",
+    ],
+    "rk4": [
+        "k1 = {f:V}",
+        "W = V + k1*h",
+        "k2 = {f:W}",
+        "W = V + k2*h",
+        "k3 = {f:W}",
+        "W = V + k3*dt",
+        "k4 = {f:W}",
+        "V = V + (k1 + 2*k2 + 2*k3 + k4)/6 * dt",
+    ],
+}
+
+_CACHE = {}
+
+
+def _vul_in(regel, model_naam):
+    """Vervang {f:X} in een regel door het (geparenthesiseerde) rechterlid in X."""
+    expressie = KERNEL_RHS[model_naam][1]
+    while "{f:" in regel:
+        begin = regel.index("{f:")
+        eind = regel.index("}", begin)
+        variabele = regel[begin + 3:eind]
+        regel = regel[:begin] + "(" + expressie.format(V=variabele) + ")" + regel[eind + 1:]
+    return regel
+
+
+_VARIABELEN = re.compile(r"\b(V|W|k[1-4]|f[0-3])\b")
+
+
+def _vul_in_systeem(regel, model_naam):
+    """
+    Schrijf een regel van een stap uit voor elke component van een toestandsvector.
+
+    Elke naam X (V, W, k1.., f0..) wordt X_0, ..., X_{d-1} en {f:X} in component j het
+    rechterlid j in X_0, ..., X_{d-1}. Alle kanten van een (ketting)toewijzing worden
+    tupels, zodat de componenten tegelijk worden toegewezen: een rechterlid leest dus
+    nooit een component die in dezelfde regel al is bijgewerkt.
+    """
+    componenten, expressies = KERNEL_SYSTEMEN[model_naam][1:]
+
+    def component(term, j):
+        def rechterlid(treffer):
+            variabele = treffer.group(1)
+            waarden = {naam: f"{variabele}_{i}" for i, naam in enumerate(componenten)}
+            return "(" + expressies[j].format(**waarden) + ")"
+        term = re.sub(r"\{f:(\w+)\}", rechterlid, term)
+        return _VARIABELEN.sub(lambda treffer: f"{treffer.group(1)}_{j}", term)
+
+    kanten = [[component(term, j) for term in kant.split(", ") for j in range(len(componenten))]
+              for kant in regel.split(" = ")]
+    return " = ".join(", ".join(kant) for kant in kanten)
+
+
+def _bron(model_naam, methode):
+    """Genereer de broncode van de kernel voor één model en methode."""
+    if model_naam in KERNEL_SYSTEMEN:
+        namen = KERNEL_SYSTEMEN[model_naam][0]
+        d = len(KERNEL_SYSTEMEN[model_naam][1])
+        vul_in = _vul_in_systeem
+        # De toestand als tupel van floats, per component één variabele in de lus
+        toestand = ", ".join(f"V_{j}" for j in range(d))
+        begin = [f"    {toestand} = [float(y) for y in V]"]
+        toestand = f"({toestand})"
+    else:
+        namen = KERNEL_RHS[model_naam][0]
+        vul_in = _vul_in
+        toestand = "V"
+        begin = []
+    kop = f"def kernel(V, n, dt, {', '.join(namen)}, _pow=math.pow, _log=math.log, _max=max):"
+    regels = [kop, "    Vs = [V]", "    append = Vs.append", "    h = 0.5*dt"] + begin
+
+    if methode in _STAPPEN:
+        regels.append("    for _ in range(n):")
+        regels += ["        " + vul_in(r, model_naam) for r in _STAPPEN[methode]]
+        regels.append(f"        append({toestand})")
+    else:
+        # Adams-Bashforth 4 (eventueel met Adams-Moulton corrector), drie RK4-stappen als aanloop
+        regels.append("    " + vul_in("f0 = {f:V}", model_naam))
+        regels.append("    " + vul_in("f3 = f2 = f1 = f0", model_naam))
+        regels.append("    for _ in range(min(3, n)):")
+        # f0 = f(V) is al bekend en is k1 van de RK4-stap
+        regels += ["        " + vul_in(r, model_naam) for r in ["k1 = f0"] + _STAPPEN["rk4"][1:]]
+        regels.append("        " + vul_in("f3, f2, f1, f0 = f2, f1, f0, {f:V}", model_naam))
+        regels.append(f"        append({toestand})")
+        regels.append("    for _ in range(n - 3):")
+        regels.append("        " + vul_in("W = V + dt/24 * (55*f0 - 59*f1 + 37*f2 - 9*f3)", model_naam))
+        if methode == "abm4":
+            regels.append("        " + vul_in("W = V + dt/24 * (9*{f:W} + 19*f0 - 5*f1 + f2)", model_naam))
+        regels.append("        " + vul_in("V = W", model_naam))
+        regels.append("        " + vul_in("f3, f2, f1, f0 = f2, f1, f0, {f:V}", model_naam))
+        regels.append(f"        append({toestand})")
+
+    regels.append("    return Vs")
+    return "\n".join(regels) + "\n"
+
+
+def kernel(model_naam, methode):
+    """
+    Gegenereerde, gecachete integratielus voor één model en integratiemethode.
+
+    De kernel is één Python-functie kernel(V0, n, dt, *params) -> Vs (lijst met
+    n+1 volumes) waarin het rechterlid van het model in elke stap is uitgeschreven:
+    geen aanroep van een stepper en een lambda per stap, en math.pow/math.log/max
+    als lokale namen. Puur Python (exec), dus geen extra afhankelijkheden. Voor een
+    model met een toestandsvector (KERNEL_SYSTEMEN) is V0 de begintoestand en
+    Vs een lijst met de toestand per stap (tupels), zonder numpy-array per stap.
+
+    Returns:
+        de functie, of None als er voor deze combinatie geen kernel is
+    """
+    methode = methode.lower()
+    sleutel = (model_naam, methode)
+    if sleutel not in _CACHE:
+        bekend = model_naam in KERNEL_RHS or model_naam in KERNEL_SYSTEMEN
+        if not bekend or methode not in ("euler", "heun", "rk4", "ab4", "abm4"):
+            _CACHE[sleutel] = None
+        else:
+            naamruimte = {"math": math}
+            exec(compile(_bron(model_naam, methode), f"<kernel {model_naam} {methode}>", "exec"), naamruimte)
+            _CACHE[sleutel] = naamruimte["kernel"]
+    return _CACHE[sleutel]
@@ -0,0 +1,96 @@
+import numpy as np
+
+from werkers import verdeel
+
+
+def folds(n_data, k=None, seed=None):
+    """
+    Verdeel de meetpunten 1..n_data-1 over k folds (k=None: leave-one-out).
+
+    Het eerste meetpunt blijft altijd in de trainingsset: het is het startvolume
+    van de simulatie en kan dus niet voorspeld worden.
+
+    Returns:
+        lijst met arrays van testindices
+    """
+    indices = np.arange(1, n_data)
+    if k is None or k >= len(indices):
+        return [np.array([i]) for i in indices]
+    if k < 2:
+        raise ValueError("Voor k-fold cross-validatie is k minstens 2.")
+    rng = np.random.default_rng(seed)
+    return [np.sort(fold) for fold in np.array_split(rng.permutation(indices), k)]
+
+
+def _volledige_fit(modeler, model_naam, start_params, data_ts, data_vs, methode, optimizer, opties):
+    """Fit op alle data (draait in een worker)."""
+    model_func = getattr(modeler, model_naam)
+    return modeler.fit_and_evaluate(model_func, dict(start_params), data_ts, data_vs, methode=methode,
+                                    optimizer=optimizer, **opties)
+
+
+def _fit_fold(i, modeler, model_naam, warm_params, data_ts, data_vs, test, methode, warm_delta_schaal, opties):
+    """
+    Fit zonder de testpunten, warm gestart vanuit het optimum op alle data, en
+    geef (i, test, kwadratische voorspelfouten op de testpunten) (draait in een worker).
+    """
+    model_func = getattr(modeler, model_naam)
+    train = np.setdiff1d(np.arange(len(data_ts)), test)
+    train_ts = [data_ts[i] for i in train]
+    train_vs = [data_vs[i] for i in train]
+
+    res = modeler.fit_and_evaluate(model_func, dict(warm_params), train_ts, train_vs, methode=methode,
+                                   delta_schaal=warm_delta_schaal, **opties)
+    fouten = [modeler.MSE(model_func, methode, res["best_params"], [data_ts[i]], [data_vs[i]]) for i in test]
+    return i, test, fouten
+
+
+def kruisvalidatie(modeler, modellen_lijst, data_ts, data_vs, k=None, methode="rk4", optimizer="hooke_jeeves",
+                   warm_delta_schaal=0.01, n_workers=None, seed=None, **opties):
+    """
+    Leave-one-out of k-fold cross-validatie van een lijst modellen.
+
+    Per model wordt eerst op alle data gefit (met de gekozen optimizer), daarna
+    volgen de folds. Elke fold is een hooke_jeeves-fit zonder de testpunten die
+    vanuit het volledige optimum start met kleine stappen, zodat een fold maar een
+    fractie van een koude fit kost. Eerst de volledige fits van alle modellen en
+    dan alle folds worden over de procespool verdeeld (werkers.verdeel).
+
+    Parameters:
+        modeler: tumorODE instantie
+        modellen_lijst: lijst met (model_func, start_params) paren
+        k (int): aantal folds, None voor leave-one-out
+        optimizer (str): optimizer voor de fit op alle data (zie fit_and_evaluate)
+        warm_delta_schaal (float): relatieve beginstap van hooke_jeeves in de folds
+        n_workers (int): aantal processen, default het aantal cores; 1 = in dit proces
+        seed: seed voor de indeling in folds (alleen bij k-fold)
+        opties: extra opties voor de fit op alle data; bij hooke_jeeves ook voor de folds
+
+    Returns:
+        lijst met resultaten van fit_and_evaluate (in de volgorde van modellen_lijst),
+        aangevuld met 'cv_mse' (gemiddelde kwadratische voorspelfout op de weggelaten
+        punten), 'cv_fouten' (per meetpunt, NaN voor het startpunt) en 'cv_folds'
+    """
+    data_ts, data_vs = list(data_ts), list(data_vs)
+    indeling = folds(len(data_vs), k, seed)
+    fold_opties = opties if optimizer == "hooke_jeeves" else {}
+
+    taken = ((modeler, model_func.__name__, start_params, data_ts, data_vs, methode, optimizer, opties)
+             for model_func, start_params in modellen_lijst)
+    resultaten = list(verdeel(_volledige_fit, taken, n_workers, volgorde=True))
+
+    fouten = [np.full(len(data_vs), np.nan) for _ in modellen_lijst]
+    taken = ((i, modeler, model_func.__name__, resultaten[i]["best_params"], data_ts, data_vs, test, methode,
+              warm_delta_schaal, fold_opties)
+             for i, (model_func, _) in enumerate(modellen_lijst) for test in indeling)
+    for i, test, waarden in verdeel(_fit_fold, taken, n_workers):
+        fouten[i][test] = waarden
+
+    for i, (model_func, _) in enumerate(modellen_lijst):
+        # De functie hoort bij de modeler van de aanroeper, niet bij een kopie in een ander proces
+        resultaten[i]["functie"] = model_func
+        resultaten[i]["cv_mse"] = float(np.nanmean(fouten[i]))
+        resultaten[i]["cv_fouten"] = fouten[i]
+        resultaten[i]["cv_folds"] = len(indeling)
+
+    return resultaten
@@ -0,0 +1,164 @@
+import inspect
+import numpy as np
+
+
+def uniforme_prior(laag, hoog):
+    """Vlakke prior op het interval [laag, hoog]."""
+    def log_prior(x):
+        x = np.asarray(x, dtype=float)
+        return np.where((x >= laag) & (x <= hoog), -np.log(hoog - laag), -np.inf)
+    return log_prior
+
+
+def normale_prior(mu, sigma):
+    """Normaal verdeelde prior met gemiddelde mu en standaarddeviatie sigma."""
+    def log_prior(x):
+        x = np.asarray(x, dtype=float)
+        return -0.5 * ((x - mu) / sigma) ** 2 - np.log(sigma * np.sqrt(2 * np.pi))
+    return log_prior
+
+
+def lognormale_prior(mu, sigma):
+    """Lognormale prior (ln(x) ~ N(mu, sigma)), alleen positieve waarden toegestaan."""
+    def log_prior(x):
+        x = np.asarray(x, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lx = np.log(x)
+            lp = -0.5 * ((lx - mu) / sigma) ** 2 - lx - np.log(sigma * np.sqrt(2 * np.pi))
+        return np.where(x > 0, lp, -np.inf)
+    return log_prior
+
+
+def gaussische_log_likelihood(mse, n_data, sigma=None):
+    """
+    Gaussische log-likelihood op basis van de MSE-residuen.
+
+    Met een bekende meetfout sigma:
+        -n/2 * (MSE / sigma^2 + ln(2*pi*sigma^2))
+    Zonder sigma wordt sigma^2 = MSE weggeprofileerd:
+        -n/2 * (ln(MSE) + ln(2*pi) + 1)
+    wat op een constante na dezelfde term is als in AIC/BIC.
+
+    Returns:
+        np.ndarray met log-likelihoods, -inf voor ontspoorde simulaties (NaN MSE)
+    """
+    mse = np.asarray(mse, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if sigma is None:
+            logl = -0.5 * n_data * (np.log(mse) + np.log(2 * np.pi) + 1)
+        else:
+            logl = -0.5 * n_data * (mse / sigma ** 2 + np.log(2 * np.pi * sigma ** 2))
+    return np.where(np.isfinite(logl), logl, -np.inf)
+
+
+def ensemble_sampler(modeler, model_func, start_params, data_ts, data_vs, priors=None,
+                     n_walkers=32, n_stappen=1000, methode="rk4", sigma=None, a=2.0,
+                     spreiding=1e-3, thin=1, uitvoer=None, seed=None):
+    """
+    Affien-invariante ensemble sampler (Goodman & Weare stretch move) voor de
+    posteriorverdeling van de modelparameters.
+
+    Per iteratie worden de walkers in twee helften bijgewerkt, elke helft tegen de
+    andere. Alle voorstellen van een helft worden met één gevectoriseerde simulatie
+    (MSE_batch) geëvalueerd, dus geen Python-simulatie per walker.
+
+    Parameters:
+        modeler: tumorODE instantie
+        model_func: modelmethode, bv. modeler.gompertz_model
+        start_params (dict): startwaarden, bv. het optimum van hooke_jeeves
+        data_ts, data_vs: meetdata
+        priors (dict): per parameter een functie die de log-prior teruggeeft (default vlak)
+        n_walkers (int): aantal walkers, even en minstens 2 * aantal parameters
+        n_stappen (int): aantal iteraties
+        methode (str): integratiemethode
+        sigma (float): meetfout van de data, None = weggeprofileerd
+        a (float): schaalparameter van de stretch move
+        spreiding (float): relatieve spreiding van de startwalkers rond start_params
+        thin (int): bewaar alleen elke thin-de iteratie
+        uitvoer (str): pad naar een csv-bestand waar bewaarde samples direct naartoe
+                       geschreven worden (stap, walker, parameters, log_prob)
+        seed: seed voor de random generator
+
+    Returns:
+        dict met 'param_namen', 'chain' (vorm (n_bewaard, n_walkers, k)),
+        'log_prob' (vorm (n_bewaard, n_walkers)) en 'acceptatie' (fractie per walker)
+    """
+    sig = inspect.signature(model_func)
+    namen = [k for k in sig.parameters.keys() if k != 'methode' and k in start_params]
+    k = len(namen)
+    if n_walkers % 2 or n_walkers < 2 * k:
+        raise ValueError("n_walkers moet even zijn en minstens 2 * het aantal parameters.")
+
+    priors = priors or {}
+    rng = np.random.default_rng(seed)
+    n_data = len(data_vs)
+
+    def log_prob(X):
+        lp = np.zeros(len(X))
+        for j, naam in enumerate(namen):
+            if naam in priors:
+                lp += priors[naam](X[:, j])
+
+        # Alleen punten binnen de prior hoeven gesimuleerd te worden
+        binnen = np.isfinite(lp)
+        logl = np.full(len(X), -np.inf)
+        if binnen.any():
+            params = {naam: X[binnen, j] for j, naam in enumerate(namen)}
+            mse = modeler.MSE_batch(model_func, methode, params, data_ts, data_vs)
+            logl[binnen] = gaussische_log_likelihood(mse, n_data, sigma)
+        return lp + logl
+
+    # Startwalkers in een kleine bol rond start_params
+    x0 = np.array([start_params[naam] for naam in namen], dtype=float)
+    schaal = spreiding * np.where(x0 != 0, np.abs(x0), 1.0)
+    X = x0 + schaal * rng.standard_normal((n_walkers, k))
+    lp = log_prob(X)
+    if not np.all(np.isfinite(lp)):
+        raise ValueError("Niet alle startwalkers hebben een eindige posterior, kies andere start_params of priors.")
+
+    h = n_walkers // 2
+    helften = (np.arange(h), np.arange(h, n_walkers))
+    n_bewaard = n_stappen // thin
+    chain = np.empty((n_bewaard, n_walkers, k))
+    chain_lp = np.empty((n_bewaard, n_walkers))
+    n_geaccepteerd = np.zeros(n_walkers)
+
+    bestand = None
+    if uitvoer is not None:
+        bestand = open(uitvoer, "w")
+        bestand.write(",".join(["stap", "walker"] + namen + ["log_prob"]) + "\n")
+
+    try:
+        for stap in range(n_stappen):
+            for actief, ander in (helften, helften[::-1]):
+                # z ~ g(z) ∝ 1/sqrt(z) op [1/a, a]
+                z = ((a - 1) * rng.random(h) + 1) ** 2 / a
+                partners = X[rng.choice(ander, h)]
+                Y = partners + z[:, None] * (X[actief] - partners)
+                lp_y = log_prob(Y)
+
+                with np.errstate(invalid="ignore"):
+                    log_r = (k - 1) * np.log(z) + lp_y - lp[actief]
+                geaccepteerd = np.log(rng.random(h)) < log_r
+                X[actief[geaccepteerd]] = Y[geaccepteerd]
+                lp[actief[geaccepteerd]] = lp_y[geaccepteerd]
+                n_geaccepteerd[actief] += geaccepteerd
+
+            if (stap + 1) % thin == 0:
+                i = (stap + 1) // thin - 1
+                chain[i] = X
+                chain_lp[i] = lp
+                if bestand is not None:
+                    rijen = np.column_stack([np.full(n_walkers, stap), np.arange(n_walkers), X, lp])
+                    np.savetxt(bestand, rijen, delimiter=",", fmt="%.17g")
+                    bestand.flush()
+    finally:
+        if bestand is not None:
+            bestand.close()
+
+    return {
+        "param_namen": namen,
+        "chain": chain,
+        "log_prob": chain_lp,
+        "acceptatie": n_geaccepteerd / n_stappen
+    }
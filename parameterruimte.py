@@ -0,0 +1,86 @@
+import math
+
+TRANSFORMATIES = ("log", "logit")
+
+
+class ParameterRuimte:
+    """
+    Grenzen en transformaties van de parameters voor de optimizers.
+
+    Een parameter met transformatie 'log' wordt gezocht als x = log(v - laag)
+    (laag default 0, geen bovengrens), een parameter met 'logit' als
+    x = logit((v - laag) / (hoog - laag)) (beide grenzen eindig). In x is de
+    zoekruimte onbegrensd en elke stap geeft een toegestane waarde. Parameters
+    met grenzen maar zonder transformatie worden niet getransformeerd; een
+    stap buiten de grenzen wordt door de optimizer verworpen zonder te simuleren.
+    """
+
+    def __init__(self, grenzen=None, transformaties=None, namen=()):
+        """
+        Parameters:
+            grenzen (dict): parameter -> (laag, hoog), None of ±inf voor geen grens
+            transformaties (dict of str): parameter -> 'log' / 'logit' / None, of één
+                                          transformatie voor alle parameters in namen
+            namen: de parameters die gefit worden
+        """
+        if isinstance(transformaties, str):
+            transformaties = {naam: transformaties for naam in namen}
+        self.transformaties = {k: v for k, v in (transformaties or {}).items() if v is not None}
+        self.grenzen = {}
+        for naam, (laag, hoog) in (grenzen or {}).items():
+            laag = -math.inf if laag is None else float(laag)
+            hoog = math.inf if hoog is None else float(hoog)
+            if not laag < hoog:
+                raise ValueError(f"Ondergrens van '{naam}' moet kleiner zijn dan de bovengrens.")
+            self.grenzen[naam] = (laag, hoog)
+
+        for naam, soort in self.transformaties.items():
+            if soort not in TRANSFORMATIES:
+                raise ValueError(f"Onbekende transformatie '{soort}' voor '{naam}', kies uit {TRANSFORMATIES}.")
+            laag, hoog = self.grenzen.get(naam, (-math.inf, math.inf))
+            if soort == "log":
+                if math.isfinite(hoog):
+                    raise ValueError(f"'{naam}' heeft een bovengrens; gebruik 'logit' in plaats van 'log'.")
+                self.grenzen[naam] = (0.0 if laag == -math.inf else laag, hoog)
+            elif not (math.isfinite(laag) and math.isfinite(hoog)):
+                raise ValueError(f"'logit' voor '{naam}' vereist een eindige onder- en bovengrens.")
+
+    def naar(self, params):
+        """Parameterwaarden -> zoekcoördinaten (kopie; andere sleutels ongewijzigd)."""
+        x = dict(params)
+        for naam, soort in self.transformaties.items():
+            if naam not in x:
+                continue
+            laag, hoog = self.grenzen[naam]
+            v = x[naam]
+            if not laag < v < hoog:
+                raise ValueError(f"Startwaarde {v} van '{naam}' ligt niet binnen ({laag}, {hoog}).")
+            if soort == "log":
+                x[naam] = math.log(v - laag)
+            else:
+                u = (v - laag) / (hoog - laag)
+                x[naam] = math.log(u / (1 - u))
+        return x
+
+    def terug(self, x):
+        """Zoekcoördinaten -> parameterwaarden (kopie)."""
+        params = dict(x)
+        for naam, soort in self.transformaties.items():
+            if naam not in params:
+                continue
+            laag, hoog = self.grenzen[naam]
+            if soort == "log":
+                params[naam] = laag + math.exp(min(x[naam], 700.0))
+            else:
+                # Numeriek stabiele sigmoïde voor grote |x|
+                z = x[naam]
+                u = 1 / (1 + math.exp(-z)) if z >= 0 else math.exp(z) / (1 + math.exp(z))
+                params[naam] = laag + u * (hoog - laag)
+        return params
+
+    def toegestaan(self, params):
+        """True als alle parameterwaarden eindig zijn en binnen hun grenzen liggen."""
+        for naam, (laag, hoog) in self.grenzen.items():
+            if naam in params and not laag <= params[naam] <= hoog:
+                return False
+        return all(math.isfinite(v) for v in params.values() if isinstance(v, (int, float)))
@@ -0,0 +1,203 @@
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_svg import FigureCanvasSVG
+from matplotlib.collections import LineCollection
+
+
+def nieuwe_figuur(breedte=10, hoogte=6, dpi=100):
+    """
+    Maak een figuur met één as die zonder pyplot en zonder beeldscherm werkt.
+
+    Returns:
+        fig, ax
+    """
+    fig = Figure(figsize=(breedte, hoogte), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_xlabel("Tijd")
+    ax.set_ylabel("Volume")
+    ax.grid(True, alpha=0.3)
+    return fig, ax
+
+
+def opslaan(fig, pad, **opties):
+    """Sla een figuur op als PNG (Agg) of SVG, afhankelijk van de extensie van pad."""
+    if str(pad).lower().endswith(".svg"):
+        FigureCanvasSVG(fig).print_figure(pad, **opties)
+    else:
+        FigureCanvasAgg(fig).print_figure(pad, **opties)
+
+
+def min_max_decimatie(ts, vs, n_buckets):
+    """
+    Verklein lange reeksen tot per bucket het minimum en maximum (in tijdsvolgorde).
+
+    Werkt in één keer voor alle kolommen van vs, zodat pieken behouden blijven en
+    elk traject evenveel punten overhoudt.
+
+    Parameters:
+        ts: tijdstippen, vorm (k,)
+        vs: volumes, vorm (k,) of (k, m)
+        n_buckets (int): aantal buckets, het resultaat heeft 2 * n_buckets punten
+
+    Returns:
+        ts_uit (vorm (2*n_buckets,) of (2*n_buckets, m)), vs_uit (vorm (2*n_buckets, m) of (2*n_buckets,))
+    """
+    ts = np.asarray(ts, dtype=float)
+    vs = np.asarray(vs, dtype=float)
+    een_d = vs.ndim == 1
+    if een_d:
+        vs = vs[:, None]
+    k, m = vs.shape
+    if 2 * n_buckets >= k:
+        return ts, (vs[:, 0] if een_d else vs)
+
+    grootte = k // n_buckets
+    rest = k - grootte * n_buckets
+    # Het laatste (onvolledige) stuk wordt bij de laatste bucket gevoegd via padding met de laatste waarde
+    if rest:
+        grootte += 1
+        pad_lengte = grootte * n_buckets - k
+        vs = np.concatenate([vs, np.repeat(vs[-1:], pad_lengte, axis=0)])
+        ts = np.concatenate([ts, np.repeat(ts[-1:], pad_lengte)])
+    blokken = vs.reshape(n_buckets, grootte, m)
+
+    basis = (np.arange(n_buckets) * grootte)[:, None]
+    i_min = basis + np.nanargmin(blokken, axis=1)
+    i_max = basis + np.nanargmax(blokken, axis=1)
+    indices = np.sort(np.stack([i_min, i_max], axis=1).reshape(2 * n_buckets, m), axis=0)
+
+    vs_uit = np.take_along_axis(vs, indices, axis=0)
+    ts_uit = ts[indices]
+    if een_d:
+        return ts_uit[:, 0], vs_uit[:, 0]
+    return ts_uit, vs_uit
+
+
+def lttb(ts, vs, n_uit):
+    """
+    Largest-Triangle-Three-Buckets downsampling van één reeks naar n_uit punten.
+
+    Behoudt de visuele vorm beter dan om-de-zoveel-punten nemen; het eerste en
+    laatste punt blijven altijd staan.
+    """
+    ts = np.asarray(ts, dtype=float)
+    vs = np.asarray(vs, dtype=float)
+    k = len(ts)
+    if n_uit >= k or n_uit < 3:
+        return ts, vs
+
+    grootte = (k - 2) / (n_uit - 2)
+    gekozen = np.empty(n_uit, dtype=int)
+    gekozen[0] = 0
+    gekozen[-1] = k - 1
+    a = 0
+    for i in range(n_uit - 2):
+        # Kandidaten in bucket i, gemiddelde van bucket i+1 als derde hoekpunt
+        start = int(i * grootte) + 1
+        stop = int((i + 1) * grootte) + 1
+        volgende_stop = min(int((i + 2) * grootte) + 1, k)
+        t_gem = ts[stop:volgende_stop].mean()
+        v_gem = vs[stop:volgende_stop].mean()
+
+        oppervlak = np.abs((ts[a] - t_gem) * (vs[start:stop] - vs[a])
+                           - (ts[a] - ts[start:stop]) * (v_gem - vs[a]))
+        a = start + int(np.argmax(oppervlak))
+        gekozen[i + 1] = a
+
+    return ts[gekozen], vs[gekozen]
+
+
+def plot_batch(ax, Ts, Vs, color="C0", alpha=0.2, linewidth=0.8, max_punten=2000, max_segmenten=200_000,
+               label=None):
+    """
+    Teken veel trajecten in één keer als één LineCollection.
+
+    De rendertijd groeit met het totale aantal lijnsegmenten (trajecten x punten
+    per traject na decimatie); boven max_segmenten wordt in plaats van losse
+    lijnen een dichtheidsbeeld getekend (plot_dichtheid), waarvan de rendertijd
+    niet meer met het aantal trajecten groeit. Met de defaults is dat vanaf
+    ongeveer 100 trajecten van 2000 punten.
+
+    Parameters:
+        ax: matplotlib-as (bv. uit nieuwe_figuur)
+        Ts: gemeenschappelijke tijdstippen, vorm (k,)
+        Vs: volumes, vorm (k, m), één kolom per traject (zoals simuleer_batch)
+        max_punten (int): lange reeksen worden met min-max decimatie tot ongeveer
+                          zoveel punten per traject teruggebracht
+        max_segmenten (int): maximaal aantal lijnsegmenten om als losse lijnen te tekenen
+
+    Returns:
+        de LineCollection (of het AxesImage van plot_dichtheid)
+    """
+    Ts = np.asarray(Ts, dtype=float)
+    Vs = np.asarray(Vs, dtype=float)
+    if Vs.ndim == 1:
+        Vs = Vs[:, None]
+    punten = min(len(Ts), max_punten) if max_punten else len(Ts)
+    if max_segmenten and Vs.shape[1] * (punten - 1) > max_segmenten:
+        return plot_dichtheid(ax, Ts, Vs, max_punten=max_punten)
+    if max_punten and len(Ts) > max_punten:
+        ts_per_lijn, Vs = min_max_decimatie(Ts, Vs, max_punten // 2)
+    else:
+        ts_per_lijn = np.broadcast_to(Ts[:, None], Vs.shape)
+
+    segmenten = np.stack([ts_per_lijn.T, Vs.T], axis=-1)
+    lijnen = LineCollection(segmenten, colors=color, alpha=alpha, linewidths=linewidth, label=label)
+    ax.add_collection(lijnen)
+    ax.autoscale_view()
+    return lijnen
+
+
+def plot_band(ax, Ts, Vs, percentielen=(5, 25, 75, 95), color="C0", label=None, omhullende=False):
+    """
+    Teken de mediaan en percentielbanden van een ensemble trajecten.
+
+    Banden worden van buiten naar binnen gevuld (bv. 5-95 en 25-75). Met
+    omhullende=True wordt ook het minimum/maximum als stippellijn getekend.
+
+    Parameters:
+        Ts: tijdstippen, vorm (k,)
+        Vs: volumes, vorm (k, m)
+        percentielen: even aantal percentielen, paarsgewijs van buiten naar binnen
+    """
+    Ts = np.asarray(Ts, dtype=float)
+    Vs = np.asarray(Vs, dtype=float)
+    percentielen = sorted(percentielen)
+    waarden = np.nanpercentile(Vs, percentielen + [50], axis=1)
+
+    n_banden = len(percentielen) // 2
+    for i in range(n_banden):
+        laag, hoog = waarden[i], waarden[len(percentielen) - 1 - i]
+        ax.fill_between(Ts, laag, hoog, color=color, alpha=0.15 + 0.15 * i, linewidth=0)
+    ax.plot(Ts, waarden[-1], color=color, label=label)
+
+    if omhullende:
+        ax.plot(Ts, np.nanmin(Vs, axis=1), color=color, linestyle=":", linewidth=0.8)
+        ax.plot(Ts, np.nanmax(Vs, axis=1), color=color, linestyle=":", linewidth=0.8)
+
+
+def plot_dichtheid(ax, Ts, Vs, bins=(600, 400), cmap="Blues", max_punten=2000):
+    """
+    Teken een ensemble als 2D-histogram van (t, V): hoe donkerder, hoe meer trajecten daar lopen.
+
+    De kosten hangen af van het aantal punten, niet van het aantal lijnen dat
+    matplotlib moet tekenen, dus ook 100k trajecten renderen snel.
+
+    Returns:
+        het AxesImage
+    """
+    Ts = np.asarray(Ts, dtype=float)
+    Vs = np.asarray(Vs, dtype=float)
+    if max_punten and len(Ts) > max_punten:
+        ts_per_lijn, Vs = min_max_decimatie(Ts, Vs, max_punten // 2)
+    else:
+        ts_per_lijn = np.broadcast_to(Ts[:, None], Vs.shape)
+
+    eindig = np.isfinite(Vs)
+    telling, t_randen, v_randen = np.histogram2d(ts_per_lijn[eindig], Vs[eindig], bins=bins)
+    beeld = ax.imshow(np.ma.masked_equal(telling.T, 0), origin="lower", aspect="auto", cmap=cmap,
+                      extent=(t_randen[0], t_randen[-1], v_randen[0], v_randen[-1]),
+                      interpolation="nearest")
+    return beeld
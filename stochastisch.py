@@ -0,0 +1,189 @@
+import numpy as np
+
+from werkers import aantal_workers, verdeel
+
+# Diffusietermen g(V, t, sigma) voor dV = f(V) dt + g(V) dW
+DIFFUSIES = {
+    "multiplicatief": lambda V, t, sigma: sigma * V,
+    "additief": lambda V, t, sigma: sigma + 0 * V,
+}
+
+
+class EnsembleStatistiek:
+    """
+    Samenvoegbare statistiek per tijdstap van een ensemble paden.
+
+    Houdt per tijdstap het aantal, het gemiddelde en de som van kwadratische
+    afwijkingen bij (Chan et al., zodat blokken uit verschillende workers
+    gecombineerd kunnen worden), plus een histogram op vaste randen voor de
+    kwantielen. Er worden dus nooit alle paden bewaard; de kwantielen zijn
+    nauwkeurig tot op ongeveer een bin-breedte.
+    """
+
+    def __init__(self, randen):
+        """
+        Parameters:
+            randen (np.ndarray): binranden per tijdstap, vorm (k, bins+1)
+        """
+        self.randen = randen
+        k, n_randen = randen.shape
+        self.aantal = 0
+        self.gemiddelde = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.telling = np.zeros((k, n_randen - 1), dtype=np.int64)
+        self.minimum = np.full(k, np.inf)
+        self.maximum = np.full(k, -np.inf)
+
+    def voeg_blok_toe(self, paden):
+        """Verwerk een blok paden met vorm (k, m)."""
+        blok = EnsembleStatistiek(self.randen)
+        blok.aantal = paden.shape[1]
+        blok.gemiddelde = paden.mean(axis=1)
+        blok.m2 = ((paden - blok.gemiddelde[:, None]) ** 2).sum(axis=1)
+        blok.minimum = paden.min(axis=1)
+        blok.maximum = paden.max(axis=1)
+        bins = self.telling.shape[1]
+        for i in range(len(paden)):
+            # Waarden buiten de randen tellen mee in de buitenste bins
+            index = np.clip(np.searchsorted(self.randen[i], paden[i], side="right") - 1, 0, bins - 1)
+            blok.telling[i] = np.bincount(index, minlength=bins)
+        self.voeg_samen(blok)
+
+    def voeg_samen(self, ander):
+        """Combineer met de statistiek van een ander (disjunct) deel van het ensemble."""
+        if ander.aantal == 0:
+            return
+        n = self.aantal + ander.aantal
+        delta = ander.gemiddelde - self.gemiddelde
+        self.gemiddelde = self.gemiddelde + delta * ander.aantal / n
+        self.m2 = self.m2 + ander.m2 + delta ** 2 * self.aantal * ander.aantal / n
+        self.aantal = n
+        self.telling += ander.telling
+        self.minimum = np.minimum(self.minimum, ander.minimum)
+        self.maximum = np.maximum(self.maximum, ander.maximum)
+
+    @property
+    def std(self):
+        """Standaardafwijking per tijdstap (n - 1 in de noemer)."""
+        return np.sqrt(self.m2 / max(1, self.aantal - 1))
+
+    def kwantiel(self, q):
+        """Kwantiel q (tussen 0 en 1) per tijdstap, lineair geïnterpoleerd binnen de bin."""
+        cumulatief = np.cumsum(self.telling, axis=1)
+        doel = q * self.aantal
+        resultaat = np.empty(len(cumulatief))
+        for i, rij in enumerate(cumulatief):
+            j = min(int(np.searchsorted(rij, doel)), len(rij) - 1)
+            voor = rij[j - 1] if j > 0 else 0
+            fractie = (doel - voor) / max(1, rij[j] - voor)
+            resultaat[i] = self.randen[i, j] + fractie * (self.randen[i, j + 1] - self.randen[i, j])
+        return np.clip(resultaat, self.minimum, self.maximum)
+
+
+def _simuleer_blok(modeler, model_naam, params, sigma, diffusie, seed_seq, m, randen=None):
+    """
+    Simuleer m paden met Euler-Maruyama (draait in een worker).
+
+    Returns:
+        de paden (vorm (n+1, m)) als randen None is, anders een EnsembleStatistiek
+    """
+    params, _ = modeler.batch_params(model_naam, params)
+    rhs_factory, V = modeler.batch_begin(model_naam, params, (m,))
+    f = rhs_factory(params)
+    g = DIFFUSIES[diffusie] if isinstance(diffusie, str) else diffusie
+
+    rng = np.random.default_rng(seed_seq)
+    dt = modeler.delta_t
+    wortel_dt = np.sqrt(dt)
+    paden = np.empty((modeler.n + 1, m))
+    paden[0] = modeler.volume(model_naam, V)
+    t = 0
+    with np.errstate(all="ignore"):
+        for i in range(1, modeler.n + 1):
+            dW = wortel_dt * rng.standard_normal(V.shape)
+            # Volumes (en concentraties) kunnen niet negatief worden: absorberend in 0
+            V = np.maximum(V + f(V, t) * dt + g(V, t, sigma) * dW, 0.0)
+            t += dt
+            paden[i] = modeler.volume(model_naam, V)
+
+    if randen is None:
+        return paden
+    statistiek = EnsembleStatistiek(randen)
+    statistiek.voeg_blok_toe(paden)
+    return statistiek
+
+
+def simuleer_sde(modeler, model_func, params, M=10000, sigma=0.05, diffusie="multiplicatief", seed=None,
+                 kwantielen=(0.05, 0.25, 0.5, 0.75, 0.95), blok=2000, bins=512, n_workers=None):
+    """
+    Stochastische versie van een model: dV = f(V) dt + g(V) dW, met M paden via Euler-Maruyama.
+
+    De drift f is het (gevectoriseerde) rechterlid van het model uit tumorODE, de
+    diffusie g is 'multiplicatief' (sigma * V), 'additief' (sigma) of een functie
+    g(V, t, sigma) (op module-niveau, zodat hij naar de workers kan). Stapgrootte
+    en horizon komen van de modeler (delta_t, n).
+
+    De paden worden in blokken van `blok` gesimuleerd. Elk blok krijgt een eigen
+    random stream uit np.random.SeedSequence(seed).spawn, dus het resultaat hangt
+    alleen van seed en blok af, niet van het aantal workers. Per blok wordt de
+    statistiek bijgewerkt en het blok weer weggegooid: het geheugen hangt af van
+    blok en bins, niet van M. Het eerste blok bepaalt de histogramranden per tijdstap.
+
+    Parameters:
+        params (dict): modelparameters (scalars)
+        M (int): aantal paden
+        sigma (float): sterkte van de ruis
+        kwantielen: gevraagde kwantielen (tussen 0 en 1)
+        n_workers (int): aantal processen, default het aantal cores; 1 = in dit proces
+
+    Returns:
+        dict met 'ts', 'gemiddelde', 'std', 'kwantielen' (kwantiel -> array), 'minimum',
+        'maximum' (alle met één waarde per tijdstap) en 'M'
+    """
+    naam = model_func if isinstance(model_func, str) else model_func.__name__
+    if not modeler.gevectoriseerd(naam) or modeler.heeft_vertraging(naam):
+        raise ValueError(f"Geen gevectoriseerde versie van model '{naam}'.")
+    if isinstance(diffusie, str) and diffusie not in DIFFUSIES:
+        raise ValueError(f"Onbekende diffusie '{diffusie}', kies uit {list(DIFFUSIES)} of geef een functie.")
+
+    groottes = [min(blok, M - start) for start in range(0, M, blok)]
+    streams = np.random.SeedSequence(seed).spawn(len(groottes))
+    n_workers = aantal_workers(n_workers)
+
+    # Eerste blok in dit proces: bepaalt de histogramranden (met marge voor de andere blokken)
+    eerste = _simuleer_blok(modeler, naam, params, sigma, diffusie, streams[0], groottes[0])
+    laag, hoog = eerste.min(axis=1), eerste.max(axis=1)
+    marge = 0.5 * np.maximum(hoog - laag, 1e-9 * np.maximum(1.0, np.abs(hoog)))
+    randen = np.linspace(np.maximum(laag - marge, 0.0), hoog + marge, bins + 1, axis=1)
+
+    statistiek = EnsembleStatistiek(randen)
+    statistiek.voeg_blok_toe(eerste)
+    del eerste
+
+    taken = ((modeler, naam, params, sigma, diffusie, stream, m, randen)
+             for stream, m in zip(streams[1:], groottes[1:]))
+    # De blokken in volgorde samenvoegen, zodat het resultaat deterministisch is
+    for deel in verdeel(_simuleer_blok, taken, n_workers, volgorde=True):
+        statistiek.voeg_samen(deel)
+
+    return {
+        "ts": modeler.tijdas(),
+        "gemiddelde": statistiek.gemiddelde,
+        "std": statistiek.std,
+        "kwantielen": {q: statistiek.kwantiel(q) for q in kwantielen},
+        "minimum": statistiek.minimum,
+        "maximum": statistiek.maximum,
+        "M": statistiek.aantal
+    }
+
+
+def sde_paden(modeler, model_func, params, M=100, sigma=0.05, diffusie="multiplicatief", seed=None):
+    """
+    Simuleer een klein aantal paden en geef ze allemaal terug, bv. om te plotten (plotten.plot_batch).
+
+    Returns:
+        Ts (vorm (n+1,)), paden (vorm (n+1, M))
+    """
+    naam = model_func if isinstance(model_func, str) else model_func.__name__
+    paden = _simuleer_blok(modeler, naam, params, sigma, diffusie, np.random.SeedSequence(seed), M)
+    return modeler.tijdas(), paden
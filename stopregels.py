@@ -0,0 +1,89 @@
+import math
+import time
+
+# Elke stopregel is een object met start() en __call__(stand). hooke_jeeves en
+# multi_start roepen start() aan het begin van elke fit aan, zodat dezelfde regels
+# voor meerdere fits gebruikt kunnen worden (bv. de folds van kruisvalidatie) en
+# zich overal hetzelfde gedragen, in dit proces of als kopie in een worker.
+
+
+class Tijdslimiet:
+    """
+    Stopregel: stop zodra de fit langer dan `seconden` (wandkloktijd) loopt.
+
+    De klok start bij het begin van elke fit (start()); bij multi_start geldt de
+    limiet voor alle starts samen. Omdat de regel
+    na elke parameterstap wordt gecontroleerd, loopt een fit hooguit twee
+    MSE-evaluaties over de limiet heen.
+    """
+
+    def __init__(self, seconden):
+        self.seconden = seconden
+        self.eind = None
+
+    def start(self):
+        self.eind = time.time() + self.seconden
+
+    def __call__(self, stand):
+        if self.eind is None:
+            self.eind = time.time() - stand["verstreken"] + self.seconden
+        return time.time() >= self.eind
+
+
+class MaxEvaluaties:
+    """
+    Stopregel: stop na `maximum` MSE-evaluaties.
+
+    Bij multi_start worden de evaluaties van alle starts opgeteld (een nieuwe
+    run is te herkennen aan een teller die weer kleiner wordt).
+    """
+
+    def __init__(self, maximum):
+        self.maximum = maximum
+        self.start()
+
+    def start(self):
+        self.eerder = 0
+        self.vorige = 0
+
+    def __call__(self, stand):
+        if stand["evaluaties"] < self.vorige:
+            self.eerder += self.vorige
+        self.vorige = stand["evaluaties"]
+        return self.eerder + stand["evaluaties"] >= self.maximum
+
+
+class Stagnatie:
+    """
+    Stopregel: stop als de MSE over de laatste `iteraties` iteraties relatief
+    minder dan `rel_tol` verbeterd is.
+
+    Anders dan tol van hooke_jeeves (een absolute grens op de stapgrootte) kijkt
+    dit naar de doelfunctie zelf, zodat de lange staart met verwaarloosbare
+    verbeteringen wordt overgeslagen. Bij een nieuwe run begint de telling opnieuw.
+    """
+
+    def __init__(self, iteraties=50, rel_tol=1e-6):
+        self.iteraties = iteraties
+        self.rel_tol = rel_tol
+        self.start()
+
+    def start(self):
+        self.geschiedenis = []
+
+    def __call__(self, stand):
+        if self.geschiedenis and stand["iteratie"] < self.geschiedenis[-1][0]:
+            self.geschiedenis = []
+        if self.geschiedenis and self.geschiedenis[-1][0] == stand["iteratie"]:
+            # Binnen een iteratie telt de laatste stand
+            self.geschiedenis[-1] = (stand["iteratie"], stand["mse"])
+        else:
+            self.geschiedenis.append((stand["iteratie"], stand["mse"]))
+            # Alleen de MSE van iteraties geleden is nodig
+            del self.geschiedenis[:-(self.iteraties + 1)]
+        if len(self.geschiedenis) <= self.iteraties:
+            return False
+        oud = self.geschiedenis[0][1]
+        if not math.isfinite(oud):
+            return False
+        return oud - stand["mse"] <= self.rel_tol * abs(oud)
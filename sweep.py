@@ -0,0 +1,210 @@
+import weakref
+from multiprocessing import shared_memory
+import numpy as np
+
+from werkers import aantal_workers, verdeel
+
+
+def _evalueer_chunk(modeler, model_naam, methode, namen, grids, vaste_params, start, stop, data_ts, data_vs,
+                    stride=1, dtype=np.float64):
+    """Bereken de MSE voor de grid-punten met platte index start..stop (draait in een worker)."""
+    vorm = tuple(len(g) for g in grids)
+    indices = np.unravel_index(np.arange(start, stop), vorm)
+    params = {naam: g[i] for naam, g, i in zip(namen, grids, indices)}
+    params.update(vaste_params)
+    model_func = getattr(modeler, model_naam)
+    return start, modeler.MSE_batch(model_func, methode, params, data_ts, data_vs, stride, dtype)
+
+
+def chunk_grootte(modeler, n_data, max_geheugen, n_workers=1, stride=1, dtype=np.float64, d=1, n_kolommen=0):
+    """
+    Aantal grid-punten per batch-simulatie zodat alle workers samen onder max_geheugen blijven.
+
+    Per punt houdt simuleer_batch het bewaarde traject vast, met d waarden per stap
+    bij een toestandsvector (zie tumorODE.geheugen_schatting), plus tijdelijke
+    arrays voor de interpolatie op n_data meetpunten en één waarde in elk van de
+    n_kolommen parameterarrays.
+    """
+    bytes_per_punt = (modeler.geheugen_schatting(1, stride, dtype, d)["totaal_bytes"] + 8 * 2 * n_data
+                      + 8 * n_kolommen)
+    return max(1, int(max_geheugen // (bytes_per_punt * max(1, n_workers))))
+
+
+def mse_landschap(modeler, model_func, grids, data_ts, data_vs, vaste_params=None, methode="rk4",
+                  max_geheugen=512 * 2**20, n_workers=None, stride=1, dtype=np.float64):
+    """
+    Bereken de MSE op een N-dimensionaal parametergrid, bv. c x V_max voor het logistisch_model.
+
+    Het grid wordt opgeknipt in chunks die elk met één gevectoriseerde simulatie
+    (MSE_batch) worden doorgerekend, verdeeld over meerdere processen.
+
+    Parameters:
+        modeler: tumorODE instantie
+        model_func: modelmethode, bv. modeler.logistisch_model
+        grids (dict): per parameter een 1-D array met de te scannen waarden (volgorde = assen)
+        data_ts, data_vs: meetdata
+        vaste_params (dict): waarden voor de parameters die niet gescand worden
+        methode (str): integratiemethode
+        max_geheugen (int): geheugenlimiet in bytes, bepaalt de chunkgrootte
+        n_workers (int): aantal processen, default het aantal cores; 1 = in dit proces
+        stride, dtype: compacte uitvoer van simuleer_batch; met stride=4 en float32
+                       passen er ongeveer 8x zoveel trajecten in max_geheugen
+
+    Returns:
+        dict met 'mse' (np.ndarray met vorm (len(grid_1), ..., len(grid_N))),
+        'param_namen' (naam per as), 'grids' (waarden per as) en 'vaste_params'
+    """
+    namen = list(grids)
+    grids = [np.asarray(grids[naam], dtype=float) for naam in namen]
+    vaste_params = dict(vaste_params or {})
+    n_workers = aantal_workers(n_workers)
+
+    vorm = tuple(len(g) for g in grids)
+    n_punten = int(np.prod(vorm))
+    chunk = chunk_grootte(modeler, len(data_vs), max_geheugen, n_workers, stride, dtype,
+                          modeler.toestand_dimensie(model_func), len(namen) + len(vaste_params))
+    grenzen = [(start, min(start + chunk, n_punten)) for start in range(0, n_punten, chunk)]
+
+    mse = np.empty(n_punten)
+    args = (modeler, model_func.__name__, methode, namen, grids, vaste_params)
+    taken = ((*args, start, stop, data_ts, data_vs, stride, dtype) for start, stop in grenzen)
+    for start, waarden in verdeel(_evalueer_chunk, taken, n_workers):
+        mse[start:start + len(waarden)] = waarden
+
+    return {
+        "mse": mse.reshape(vorm),
+        "param_namen": namen,
+        "grids": grids,
+        "vaste_params": vaste_params
+    }
+
+
+
+def _verwijder_naam(shm):
+    """Verwijder de naam van een shared-memory blok (ook als dat al gebeurd is)."""
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class _GedeeldBlok:
+    """
+    Eigenaar van een shared-memory blok, als base van de numpy arrays erop.
+
+    Elk array (en elke view daarvan) houdt via zijn base dit object vast; pas als
+    het laatste array weg is wordt de mapping gesloten. Een view kan dus nooit
+    naar vrijgegeven geheugen wijzen.
+    """
+
+    def __init__(self, shm, vorm, dtype):
+        self.shm = shm
+        count = int(np.prod(vorm))
+        self._weergave = np.frombuffer(shm.buf, dtype=dtype, count=count).reshape(vorm)
+        self.__array_interface__ = self._weergave.__array_interface__
+
+    def __del__(self):
+        # Eerst de export op de buffer loslaten, anders weigert close()
+        self._weergave = None
+        self.shm.close()
+
+
+class GedeeldeSweep:
+    """
+    Resultaat van traject_sweep: de trajecten staan in gedeeld geheugen.
+
+    vs is een numpy array op dat geheugen (geen kopie). sluit() (ook aan het eind
+    van een with-blok of als het object opgeruimd wordt) verwijdert de naam van
+    het blok, zodat andere processen er niet meer aan kunnen koppelen; het
+    geheugen zelf blijft geldig zolang er nog een array of view van vs bestaat.
+
+    Voorbeeld:
+        with traject_sweep(modeler, modeler.gompertz_model, params) as res:
+            eind = res.vs[-1]
+    """
+
+    def __init__(self, ts, vorm, dtype):
+        self.ts = ts
+        nbytes = max(1, int(np.prod(vorm)) * np.dtype(dtype).itemsize)
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._naam = shm.name
+        self._opruimer = weakref.finalize(self, _verwijder_naam, shm)
+        self.vs = np.asarray(_GedeeldBlok(shm, vorm, dtype))
+
+    @property
+    def naam(self):
+        """Naam van het shared-memory blok, waarmee workers eraan koppelen."""
+        return self._naam
+
+    def sluit(self):
+        """Verwijder de naam van het blok; het geheugen gaat weg met het laatste array erop."""
+        self._opruimer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.sluit()
+
+
+def _simuleer_in_gedeeld(modeler, model_naam, methode, params, start, stop, shm_naam, vorm, dtype, stride):
+    """Simuleer de parametersets start..stop en schrijf ze direct in het gedeelde blok (draait in een worker)."""
+    vs = np.asarray(_GedeeldBlok(shared_memory.SharedMemory(name=shm_naam), vorm, dtype))
+    # De worker schrijft zijn kolommen direct in het blok, zonder eigen kopie van de uitvoer
+    modeler.simuleer_batch(model_naam, params, methode, stride, dtype, out=vs[:, start:stop])
+    return stop - start
+
+
+def traject_sweep(modeler, model_func, params, methode="rk4", stride=1, dtype=np.float64,
+                  max_geheugen=512 * 2**20, n_workers=None):
+    """
+    Simuleer een grote batch parametersets over meerdere processen, met de volledige trajecten als resultaat.
+
+    De uitvoer wordt vooraf in multiprocessing.shared_memory aangemaakt; elke
+    worker schrijft zijn kolommen daar direct in (simuleer_batch met out=), zodat
+    er geen trajecten gekopieerd, gepickled of teruggestuurd worden. De chunks
+    zijn zo groot dat de workers samen (toestand plus uitvoer per set, zie
+    geheugen_schatting) onder max_geheugen blijven. Gaat er in een worker iets mis, dan
+    worden de overige chunks geannuleerd en wordt het blok vrijgegeven voordat
+    de fout doorgegeven wordt.
+
+    Parameters:
+        params (dict): per parameter een scalar of een array met één waarde per parameterset
+        stride, dtype: uitvoeropties zoals bij simuleer_batch
+        max_geheugen (int): bepaalt hoeveel sets een worker per keer simuleert
+        n_workers (int): aantal processen, default het aantal cores
+
+    Returns:
+        GedeeldeSweep met ts (vorm (k,)) en vs (vorm (k, m) of (k, m, d))
+    """
+    naam = model_func if isinstance(model_func, str) else model_func.__name__
+    if not modeler.gevectoriseerd(naam):
+        raise ValueError(f"Geen gevectoriseerde versie van model '{naam}'.")
+    batch_params, m = modeler.batch_params(naam, params)
+    if len(m) != 1:
+        raise ValueError("Parameterarrays moeten 1-dimensionaal zijn.")
+    batch_params = {k: np.broadcast_to(v, m) for k, v in batch_params.items()}
+
+    ts = modeler.tijdas(stride)
+    d = modeler.toestand_dimensie(naam)
+    vorm = (len(ts),) + m + ((d,) if d > 1 else ())
+    n_workers = aantal_workers(n_workers)
+    per_set = modeler.geheugen_schatting(1, stride, dtype, d)["totaal_bytes"]
+    if modeler.heeft_vertraging(naam):
+        # Plus de ringbuffer met de geschiedenis tot max(tau) terug
+        per_set += 8 * (int(np.ceil(np.nanmax(np.maximum(batch_params["tau"], 0.0)) / modeler.delta_t)) + 2)
+    chunk = max(1, min(-(-m[0] // n_workers), int(max_geheugen // (per_set * n_workers))))
+
+    resultaat = GedeeldeSweep(ts, vorm, dtype)
+    taken = ((modeler, naam, methode, {k: v[start:start + chunk] for k, v in batch_params.items()},
+              start, min(start + chunk, m[0]), resultaat.naam, vorm, dtype, stride)
+             for start in range(0, m[0], chunk))
+    try:
+        for _ in verdeel(_simuleer_in_gedeeld, taken, n_workers):
+            pass
+    except BaseException:
+        # verdeel heeft de pool dan al afgesloten, dus er schrijft geen worker meer in het blok
+        resultaat.sluit()
+        raise
+
+    return resultaat
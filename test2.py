@@ -2,7 +2,6 @@ import inspect
 import copy
 import numpy as np
 import math
-import matplotlib.pyplot as plt
 
 class tumorODE:
     """
@@ -250,12 +249,14 @@ class tumorODE:
 
     def plot(self, Ts, Vs, color=None, label=None):
         """Plot een enkele simulatielijn."""
+        import matplotlib.pyplot as plt
 
         plt.plot(Ts, Vs, color=color, label=label)
 
 
     def toon_grafiek(self, titel="Tumor Groei Simulatie"):
         """Maak de grafiek op en toon deze."""
+        import matplotlib.pyplot as plt
 
         plt.gcf().set_size_inches(10, 6)
         plt.axvline(0.0, color='k', linestyle='--', alpha=0.5)
@@ -268,6 +269,7 @@ class tumorODE:
 
 
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt
     
 
     # Kleine testdataset van: [S.S. Hassan & H.M. Al-Saedi, 2024](https://doi.org/10.1051/bioconf/20249700118)
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from tumor_ODE import tumorODE
+
+
+@pytest.mark.parametrize("methode", ["euler", "heun", "rk4"])
+@pytest.mark.parametrize("a, b, dt", [
+    (-1.2, 0.0, 0.7),      # uitdovend; bij Euler alpha < 0 (oscillerend)
+    (-0.3, 0.0, 0.1),      # uitdovend naar 0
+    (-0.5, 2.0, 0.1),      # naar het evenwicht -b/a
+    (0.0, 0.5, 0.1),       # lineair
+    (0.4, 0.0, 0.05),      # exponentiële groei
+    (0.2, -0.1, 0.1),
+])
+def test_gesloten_vorm_gelijk_aan_lus(methode, a, b, dt):
+    modeler = tumorODE(1.5, dt, 200)
+    _, lus = modeler._simulate(lambda V, t: a * V + b, methode)
+    gesloten = modeler._affiene_oplossing(a, b, modeler.start_volume, methode, modeler.n)
+    # Relatief per punt, ook waar de oplossing tot ver onder eps * V0 is uitgedoofd
+    np.testing.assert_allclose(gesloten, lus, rtol=1e-9, atol=1e-300)
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from tumor_ODE import tumorODE
+
+DATA_TS = np.arange(0.0, 20.0)
+DATA_VS = 10 / (1 + 9 * np.exp(-0.4 * DATA_TS))
+START = {"c": 0.1, "V_max": 6.0}
+
+
+@pytest.mark.parametrize("opties", [{}, {"transformaties": "log"}])
+def test_hervatten_geeft_exact_dezelfde_fit(tmp_path, opties):
+    modeler = tumorODE(1.0, 0.5, 40)
+    model_func = modeler.logistisch_model
+    verwacht = modeler.hooke_jeeves(model_func, dict(START), DATA_TS, DATA_VS, max_iter=60, **opties)
+
+    # Onderbreek na 25 iteraties (terugroep stopt aan het eind van een iteratie) en hervat
+    pad = str(tmp_path / "fit.json")
+    modeler.hooke_jeeves(model_func, dict(START), DATA_TS, DATA_VS, max_iter=60, checkpoint=pad,
+                         terugroep=lambda stand: stand["iteratie"] >= 25, **opties)
+    hervat = modeler.hooke_jeeves(model_func, dict(START), DATA_TS, DATA_VS, max_iter=60, resume=pad, **opties)
+
+    assert hervat == verwacht
+
+
+def test_hervatten_van_ander_model_geweigerd(tmp_path):
+    modeler = tumorODE(1.0, 0.5, 40)
+    pad = str(tmp_path / "fit.json")
+    modeler.hooke_jeeves(modeler.logistisch_model, dict(START), DATA_TS, DATA_VS, max_iter=5, checkpoint=pad)
+    with pytest.raises(ValueError):
+        modeler.hooke_jeeves(modeler.gompertz_model, dict(START), DATA_TS, DATA_VS, resume=pad)
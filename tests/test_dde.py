@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from tumor_ODE import tumorODE
+
+# Model met vertraging en het gewone model waar het bij tau = 0 op neerkomt
+PAREN = [
+    ("vertraagd_logistisch_model", "logistisch_model", {"c": 0.3, "V_max": 10.0}),
+    ("vertraagd_gompertz_model", "gompertz_model", {"c": 0.2, "V_max": 10.0}),
+    ("vertraagd_exponentieel_afvlakkend_model", "exponentieel_afvlakkend_model", {"c": 0.1, "V_max": 10.0}),
+    ("vertraagd_allee_effect_model", "allee_effect_model", {"c": 0.01, "V_min": 0.5, "V_max": 10.0}),
+]
+
+
+@pytest.mark.parametrize("methode", ["euler", "heun", "rk4"])
+@pytest.mark.parametrize("vertraagd, gewoon, params", PAREN)
+def test_tau_nul_is_de_ode(vertraagd, gewoon, params, methode):
+    modeler = tumorODE(1.0, 0.1, 300)
+    Ts, Vs = getattr(modeler, vertraagd)(tau=0.0, methode=methode, **params)
+    Ts_ode, Vs_ode = getattr(modeler, gewoon)(methode=methode, **params)
+
+    np.testing.assert_array_equal(Ts, Ts_ode)
+    # Op afronding na: de tussenstanden worden bij tau = 0 geïnterpoleerd
+    np.testing.assert_allclose(Vs, Vs_ode, rtol=1e-12, atol=0)
+
+
+def test_negatieve_tau_is_ontoelaatbaar():
+    modeler = tumorODE(1.0, 0.1, 100)
+    tau = np.array([-1.0, 0.0, 0.5])
+    _, Vs = modeler.simuleer_batch(modeler.vertraagd_logistisch_model, {"c": 0.3, "V_max": 10.0, "tau": tau})
+
+    assert np.isnan(Vs[:, 0]).all()
+    assert np.isfinite(Vs[:, 1:]).all()
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import van tumor_ODE zelf (numpy al geladen); pyplot laden kost alleen al enkele tienden van een seconde
+BUDGET_SECONDEN = 0.25
+
+CODE = """
+import sys, time
+import numpy
+begin = time.perf_counter()
+import {module}
+duur = time.perf_counter() - begin
+print(duur, "matplotlib" in sys.modules)
+"""
+
+
+def _importeer(module):
+    """Importeer module in een vers proces; geeft (importtijd, matplotlib geladen)."""
+    uitvoer = subprocess.run([sys.executable, "-c", CODE.format(module=module)], cwd=REPO, check=True,
+                             capture_output=True, text=True).stdout.split()
+    return float(uitvoer[0]), uitvoer[1] == "True"
+
+
+@pytest.mark.parametrize("module", ["tumor_ODE", "batch_fit", "sweep", "kruisvalidatie", "gevoeligheid"])
+def test_geen_matplotlib_bij_import(module):
+    _, matplotlib_geladen = _importeer(module)
+    assert not matplotlib_geladen
+
+
+def test_importtijd_binnen_budget():
+    # Beste van drie, zodat een toevallig trage start de test niet laat falen
+    duur = min(_importeer("tumor_ODE")[0] for _ in range(3))
+    assert duur < BUDGET_SECONDEN, f"import tumor_ODE duurde {duur:.3f} s (budget {BUDGET_SECONDEN} s)"
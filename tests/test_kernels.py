@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+import kernels
+from tumor_ODE import tumorODE
+
+METHODES = ["euler", "heun", "rk4", "ab4", "abm4"]
+
+# Parameters per model met een kernel, zo gekozen dat elke tak van het rechterlid meedoet
+PARAMS = {
+    "lineaire_model": {"c": 0.3},
+    "exponentieel_model": {"c": 0.05},
+    "mendelsohn_model": {"c": 0.2, "d": 0.7},
+    "logistisch_model": {"c": 0.3, "V_max": 10.0},
+    "gompertz_model": {"c": 0.2, "V_max": 10.0},
+    "von_bertalanffy_model": {"c": 0.5, "d": 0.1},
+    "exponentieel_afvlakkend_model": {"c": 0.1, "V_max": 10.0},
+    "allee_effect_model": {"c": 0.01, "V_min": 0.5, "V_max": 10.0},
+    "lineair_gelimiteerd_model": {"c": 1.0, "d": 5.0},
+    "oppervlak_gelimiteerd_model": {"c": 0.5, "d": 2.0},
+    "tumor_pk_model": {"c": 0.3, "V_max": 10.0, "k_el": 0.2, "e_max": 0.5, "EC50": 1.0, "C0": 2.0,
+                       "k12": 0.1, "k21": 0.05},
+    "pqn_model": {"c": 0.3, "V_max": 10.0, "k_pq": 0.05, "k_qn": 0.02, "k_opruim": 0.01},
+}
+
+
+def test_elk_kernelmodel_getest():
+    assert set(PARAMS) == set(kernels.KERNEL_RHS) | set(kernels.KERNEL_SYSTEMEN)
+
+
+@pytest.mark.parametrize("methode", METHODES)
+@pytest.mark.parametrize("model_naam", sorted(PARAMS))
+def test_kernel_bit_gelijk_aan_generieke_lus(model_naam, methode):
+    modeler = tumorODE(1.0, 0.1, 300)
+    model_func = getattr(modeler, model_naam)
+    params = PARAMS[model_naam]
+    if model_naam in kernels.KERNEL_SYSTEMEN:
+        namen = kernels.KERNEL_SYSTEMEN[model_naam][0]
+        V0 = modeler.batch_begin(model_naam, modeler.batch_params(model_naam, params)[0], (1,))[1][0]
+    else:
+        namen = kernels.KERNEL_RHS[model_naam][0]
+        V0 = modeler.start_volume
+
+    # Rechtstreeks de kernel, want _simulate lost de affiene modellen in gesloten vorm op
+    met_kernel = kernels.kernel(model_naam, methode)(V0, modeler.n, modeler.delta_t, *(params[k] for k in namen))
+    _, lus = modeler._simulate(modeler.rhs(model_func, params), methode, V0=V0)
+
+    np.testing.assert_array_equal(np.array(met_kernel), np.array(lus))
+
+
+@pytest.mark.parametrize("model_naam", sorted(kernels.KERNEL_SYSTEMEN))
+def test_systeemmodel_gebruikt_kernel(model_naam, monkeypatch):
+    modeler = tumorODE(1.0, 0.1, 300)
+    model_func = getattr(modeler, model_naam)
+    Ts, Ys = model_func(**PARAMS[model_naam])
+    monkeypatch.setattr(modeler, "GEBRUIK_KERNELS", False)
+    Ts_lus, Ys_lus = model_func(**PARAMS[model_naam])
+
+    assert Ts == Ts_lus
+    np.testing.assert_array_equal(Ys, Ys_lus)
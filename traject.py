@@ -0,0 +1,130 @@
+import numpy as np
+
+
+class Trajectory:
+    """
+    Lui berekend simulatieresultaat.
+
+    Er wordt pas geïntegreerd als er om een tijdstip gevraagd wordt, en dan alleen
+    tot dat tijdstip; latere vragen verlengen het traject vanaf de laatste
+    berekende stap. De stappen zijn die van de generieke lus in tumorODE._simulate
+    (met dezelfde stepper, bit-gelijk). _simulate zelf rekent affiene modellen in
+    gesloten vorm uit en gebruikt voor andere scalaire modellen een gegenereerde
+    kernel; die resultaten zijn gelijk op afronding na, niet bit-gelijk.
+
+    Voorbeeld:
+        traj = testTumor.traject(testTumor.gompertz_model, c=1, V_max=2)
+        traj.at(3.5)        # integreert tot t = 3.5
+        traj[-1]            # (t, V) van de laatste stap (n)
+        Ts, Vs = traj.as_tuple()
+    """
+
+    __slots__ = ("_f", "_stepper", "_dt", "n", "_ts", "_vs", "_lengte")
+
+    def __init__(self, f, stepper, V0, delta_t, n, t0=0, blok=256):
+        """
+        Parameters:
+            f (callable): functie f(V, t) die dV/dt retourneert
+            stepper (callable): integratiestap stepper(f, V, t, dt)
+            V0, t0: begintoestand
+            delta_t (float): tijdstap
+            n (int): nominaal aantal stappen (lengte, slicing en as_tuple)
+            blok (int): aantal plaatsen waarmee de buffers minimaal groeien
+        """
+        self._f = f
+        self._stepper = stepper
+        self._dt = delta_t
+        self.n = n
+        self._ts = np.empty(max(1, min(n + 1, blok)))
+        self._vs = np.empty_like(self._ts)
+        self._ts[0] = t0
+        self._vs[0] = V0
+        self._lengte = 1
+
+    @property
+    def berekend(self):
+        """Aantal tot nu toe berekende punten (inclusief het beginpunt)."""
+        return self._lengte
+
+    def _integreer_tot(self, index):
+        """Zorg dat de punten 0..index berekend zijn."""
+        if index < self._lengte:
+            return
+        if index >= len(self._ts):
+            grootte = max(index + 1, 2 * len(self._ts))
+            self._ts = np.resize(self._ts, grootte)
+            self._vs = np.resize(self._vs, grootte)
+
+        f, stepper, dt = self._f, self._stepper, self._dt
+        i = self._lengte - 1
+        # Python floats in de lus, net als in _simulate, zodat de stappen bit-gelijk zijn
+        t = self._ts[i].item()
+        V = self._vs[i].item()
+        ts, vs = self._ts, self._vs
+        for i in range(self._lengte, index + 1):
+            V = stepper(f, V, t, dt)
+            t += dt
+            ts[i] = t
+            vs[i] = V
+        self._lengte = index + 1
+
+    def at(self, t):
+        """
+        Volume op tijdstip(pen) t via lineaire interpolatie.
+
+        Tijdstippen na stap n verlengen het traject gewoon verder.
+        """
+        t_arr = np.asarray(t, dtype=float)
+        t_max = float(np.max(t_arr)) if t_arr.size else self._ts[0]
+        index = max(0, int(np.ceil((t_max - self._ts[0]) / self._dt)))
+        self._integreer_tot(index)
+        # Afrondingsverschillen in de opgetelde tijd: zo nodig één stap extra
+        if self._ts[self._lengte - 1] < t_max:
+            self._integreer_tot(self._lengte)
+
+        lengte = self._lengte
+        resultaat = np.interp(t_arr, self._ts[:lengte], self._vs[:lengte])
+        return resultaat.item() if resultaat.ndim == 0 else resultaat
+
+    def __len__(self):
+        return self.n + 1
+
+    def __getitem__(self, index):
+        """traj[i] geeft (t, V); traj[a:b:c] geeft (Ts, Vs) als numpy arrays."""
+        if isinstance(index, slice):
+            indices = np.arange(*index.indices(self.n + 1))
+            if len(indices) == 0:
+                return np.empty(0), np.empty(0)
+            self._integreer_tot(int(indices.max()))
+            return self._ts[indices], self._vs[indices]
+
+        if index < 0:
+            index += self.n + 1
+        if not 0 <= index <= self.n:
+            raise IndexError("Trajectory index buiten bereik.")
+        self._integreer_tot(index)
+        return self._ts[index].item(), self._vs[index].item()
+
+    @property
+    def ts(self):
+        """Tijdstippen 0..n als numpy array (integreert zo nodig)."""
+        self._integreer_tot(self.n)
+        return self._ts[:self.n + 1]
+
+    @property
+    def vs(self):
+        """Volumes 0..n als numpy array (integreert zo nodig)."""
+        self._integreer_tot(self.n)
+        return self._vs[:self.n + 1]
+
+    @property
+    def eind_volume(self):
+        """Volume na n stappen."""
+        return self[self.n][1]
+
+    def as_tuple(self):
+        """Het klassieke (Ts, Vs) resultaat met lijsten, zoals de modelmethoden teruggeven."""
+        return self.ts.tolist(), self.vs.tolist()
+
+    def __repr__(self):
+        return f"Trajectory(n={self.n}, delta_t={self._dt}, berekend={self._lengte})"
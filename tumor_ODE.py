@@ -1,8 +1,60 @@
 import inspect
 import copy
+import collections
+import json
+import os
 import numpy as np
 import math
-import matplotlib.pyplot as plt
+import time
+from traject import Trajectory
+from behandeling import gezamenlijke_breekpunten
+import kernels
+from parameterruimte import ParameterRuimte
+
+__version__ = "1.0.0"
+
+
+def schrijf_checkpoint(pad, toestand):
+    """
+    Schrijf de toestand van een optimalisatie atomair weg als json.
+
+    Floats worden door json met repr() weggeschreven en komen dus bit-voor-bit
+    terug; eerst naar een tijdelijk bestand schrijven voorkomt een half checkpoint
+    als het proces midden in het schrijven stopt.
+    """
+    tijdelijk = f"{pad}.tmp"
+    with open(tijdelijk, "w") as bestand:
+        json.dump(toestand, bestand, separators=(",", ":"))
+    os.replace(tijdelijk, pad)
+
+
+def lees_checkpoint(pad):
+    """Lees een met schrijf_checkpoint weggeschreven toestand."""
+    with open(pad) as bestand:
+        return json.load(bestand)
+
+
+def _tumor_pk_rhs(p):
+    """Rechterlid van tumor_pk_model; werkt op Y met vorm (3,) of (m, 3)."""
+    def f(Y, t):
+        V, C, C_p = Y[..., 0], Y[..., 1], Y[..., 2]
+        dV = p["c"] * V * (1 - V/p["V_max"]) - p["e_max"] * C / (p["EC50"] + C) * V
+        dC = -(p["k_el"] + p["k12"]) * C + p["k21"] * C_p
+        dC_p = p["k12"] * C - p["k21"] * C_p
+        return np.stack((dV, dC, dC_p), axis=-1)
+    return f
+
+
+def _pqn_rhs(p):
+    """Rechterlid van pqn_model; werkt op Y met vorm (3,) of (m, 3)."""
+    def f(Y, t):
+        P, Q, N = Y[..., 0], Y[..., 1], Y[..., 2]
+        dP = p["c"] * P * (1 - (P + Q + N)/p["V_max"]) - p["k_pq"] * P
+        dQ = p["k_pq"] * P - p["k_qn"] * Q
+        dN = p["k_qn"] * Q - p["k_opruim"] * N
+        return np.stack((dP, dQ, dN), axis=-1)
+    return f
+
 
 class tumorODE:
     """
@@ -21,10 +73,21 @@ class tumorODE:
         - von_bertalanffy_model
         - gompertz_model
 
+    Modellen met vertraging (delay-differentiaalvergelijkingen, parameter tau):
+        - vertraagd_logistisch_model
+        - vertraagd_gompertz_model
+        - vertraagd_exponentieel_afvlakkend_model
+        - vertraagd_allee_effect_model
+
+    Modellen met een toestandsvector (meerdere compartimenten):
+        - tumor_pk_model
+        - pqn_model
+
     Integratiemethoden:
         - Euler
         - Heun
         - Runge-Kutta 4 (RK4)
+        - Adams-Bashforth 4 (ab4) en Adams-Bashforth-Moulton 4 (abm4), met RK4-aanloop
     """
 
     def __init__(self, volume: float, delta_t: float, n: int):
@@ -60,80 +123,796 @@ class tumorODE:
         k4 = f(V + k3*dt, t + dt)
         return V + (k1 + 2*k2 + 2*k3 + k4)/6 * dt
 
-    def _simulate(self, f, methode="rk4"):
+    def _maak_adams_stepper(self, corrector):
         """
-        Simuleer een ODE-model met de opgegeven integratiemethode, met euler als default.
+        Maak een Adams-Bashforth 4 stapfunctie (met corrector: Adams-Moulton 4, PECE).
 
-        Parameters:
-            f (callable): functie f(V, t) die dV/dt retourneert
-            methode (str): 'euler', 'heun', of 'rk4' met euler als default
+        Een meerstapsmethode hergebruikt de afgeleiden van de vorige stappen: AB4
+        kost één evaluatie van f per stap, ABM4 twee, tegen vier voor RK4. De
+        laatste vier afgeleiden staan in een ringbuffer. De stapfunctie houdt dus
+        toestand bij en hoort bij één traject; zolang elke aanroep verdergaat waar
+        de vorige eindigde (zelfde f en dt, V de vorige uitkomst en t gelijk op
+        afronding na, zoals bij t = a + i*h) wordt de buffer gebruikt, anders
+        begint hij opnieuw met drie RK4-stappen als aanloop.
+        """
+        afgeleiden = collections.deque(maxlen=4)   # f_{k-3}, ..., f_k (oudste eerst)
+        vorige = [None, None, None, None]          # f, t, dt en V na de laatste stap
 
-        Returns:
-            Ts (list[float]): tijdstappen
-            Vs (list[float]): volumes bij elke tijdstap
+        def stap(f, V, t, dt):
+            f_vorig, t_vorig, dt_vorig, V_vorig = vorige
+            vervolg = (f is f_vorig and dt == dt_vorig and abs(t - t_vorig) <= 1e-9 * abs(dt)
+                       and (V is V_vorig or np.array_equal(V, V_vorig)))
+            if not vervolg:
+                afgeleiden.clear()
+                afgeleiden.append(f(V, t))
+
+            if len(afgeleiden) < 4:
+                # RK4-aanloop; f(V, t) staat al in de buffer en is dus k1
+                k1 = afgeleiden[-1]
+                k2 = f(V + 0.5*k1*dt, t + 0.5*dt)
+                k3 = f(V + 0.5*k2*dt, t + 0.5*dt)
+                k4 = f(V + k3*dt, t + dt)
+                V_nieuw = V + (k1 + 2*k2 + 2*k3 + k4)/6 * dt
+            else:
+                f3, f2, f1, f0 = afgeleiden
+                V_nieuw = V + dt/24 * (55*f0 - 59*f1 + 37*f2 - 9*f3)
+                if corrector:
+                    V_nieuw = V + dt/24 * (9*f(V_nieuw, t + dt) + 19*f0 - 5*f1 + f2)
+
+            afgeleiden.append(f(V_nieuw, t + dt))
+            vorige[:] = f, t + dt, dt, V_nieuw
+            return V_nieuw
+
+        return stap
+
+    # Namen van de integratiemethoden die _kies_stepper kent
+    METHODES = ("euler", "heun", "rk4", "ab4", "abm4")
+
+    # Meerstapsmethoden, met per methode of er een Adams-Moulton corrector gebruikt wordt
+    _MEERSTAPS = {"ab4": False, "abm4": True}
+
+    def _kies_stepper(self, methode):
         """
-        stepper = {
+        Geef de integratie-stap functie bij de methode, met rk4 als default.
+
+        Voor 'ab4' en 'abm4' is dat elke keer een nieuwe stapfunctie met eigen
+        geschiedenis (zie _maak_adams_stepper), dus één per traject.
+        """
+        if methode.lower() in self._MEERSTAPS:
+            return self._maak_adams_stepper(self._MEERSTAPS[methode.lower()])
+        return {
             "euler": self._step_euler,
             "heun": self._step_heun,
             "rk4": self._step_rk4
         }.get(methode.lower(), self._step_rk4)
 
-        Ts = [0]
-        Vs = [self.start_volume]
-        V = self.start_volume
+    # Per methode de factor g(h) waarmee één stap van een affien model dV/dt = a*V + b
+    # exact V -> V + dt * g(h) * (a*V + b) wordt, met h = a*dt
+    _AFFIENE_GROEIFACTOR = {
+        "euler": lambda h: 1.0,
+        "heun": lambda h: 1 + h/2,
+        "rk4": lambda h: 1 + h/2 + h*h/6 + h*h*h/24
+    }
+
+    def _affiene_oplossing(self, a, b, V0, methode, n, stappen=None):
+        """
+        Alle n stappen van een affien model dV/dt = a*V + b in één keer.
+
+        Eén Euler-, Heun- of RK4-stap is voor zo'n model de affiene afbeelding
+        V -> alpha*V + beta, met alpha - 1 = h*g(h) en beta = b*dt*g(h). Na k stappen geldt
+        V_k = V0*alpha^k + beta*(alpha^k - 1)/(alpha - 1), met alpha^k en alpha^k - 1 elk
+        via exp/expm1 van k*log1p(alpha - 1), zodat er ook bij uitdoven niets wegvalt.
+        Dit volgt de discretisatie van de gekozen methode exact, op afronding na.
+
+        Parameters:
+            a, b: coëfficiënten (scalars of arrays van gelijke vorm, voor een batch)
+            V0: beginvolume
+            stappen: alleen deze stapnummers uitrekenen (default 0..n)
+
+        Returns:
+            np.ndarray met vorm (n+1,) (of (len(stappen),)) + vorm van a/b
+        """
+        groeifactor = self._AFFIENE_GROEIFACTOR.get(methode.lower(), self._AFFIENE_GROEIFACTOR["rk4"])
+        a = np.asarray(a, dtype=float)
+        b = np.asarray(b, dtype=float)
+        h = a * self.delta_t
+        g = groeifactor(h)
+        delta = h * g                       # alpha - 1
+        beta = b * self.delta_t * g
+        k = np.arange(n + 1) if stappen is None else np.asarray(stappen)
+        k = k.reshape(k.shape + (1,) * delta.ndim)
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            # alpha^k en alpha^k - 1 elk rechtstreeks; log1p kan alleen voor alpha > 0, bij
+            # alpha <= 0 (bv. Euler met a*dt <= -1, oscillerend) is alpha^k met gehele k
+            # gewoon een macht
+            positief = delta > -1
+            log_alpha = k * np.log1p(np.where(positief, delta, 0.0))
+            macht = np.where(positief, np.exp(log_alpha), np.power(1 + delta, k))
+            groei = np.where(positief, np.expm1(log_alpha), macht - 1)
+            # (alpha^k - 1) / (alpha - 1), met limiet k voor alpha -> 1
+            som = np.where(delta != 0, groei / np.where(delta != 0, delta, 1.0), k)
+            # V0*alpha^k + beta*som: geen V0 + (alpha^k - 1)*V0, want bij een uitdovende
+            # oplossing (alpha^k -> 0) heft dat zich weg tot ruis ter grootte van eps*V0
+            Vs = V0 * macht + beta * som
+        # Stap 0 is altijd precies het beginvolume
+        return np.where(k == 0, V0, Vs)
+
+    # Gebruik gegenereerde kernels (kernels.kernel) voor de modellen waar mogelijk
+    GEBRUIK_KERNELS = True
+
+    def _simulate(self, f, methode="rk4", V0=None, t0=0, n=None, affien=None, kernel=None):
+        """
+        Simuleer een ODE-model met de opgegeven integratiemethode, met euler als default.
+
+        Parameters:
+            f (callable): functie f(V, t) die dV/dt retourneert; V mag ook een
+                          numpy toestandsvector zijn (dan geeft f een vector terug)
+            methode (str): 'euler', 'heun', 'rk4', 'ab4' of 'abm4' met euler als default
+            V0, t0: begintoestand, default het startvolume op t=0
+            n (int): aantal stappen, default self.n
+            affien (tuple): (a, b) als f(V, t) = a*V + b; dan wordt het hele traject
+                            in één gevectoriseerde stap berekend (_affiene_oplossing),
+                            behalve bij de meerstapsmethoden
+            kernel (tuple): (model_naam, params) voor een gegenereerde integratielus
+                            (kernels.kernel) die hetzelfde resultaat geeft als de lus met f
+
+        Returns:
+            Ts (list[float]): tijdstappen
+            Vs (list[float]): volumes bij elke tijdstap (np.ndarray met vorm (n+1, d)
+                              bij een toestandsvector)
+        """
+        V = self.start_volume if V0 is None else V0
+        t = t0
+        n = self.n if n is None else n
+        vector = np.ndim(V) > 0
+
+        if affien is not None and methode.lower() not in self._MEERSTAPS:
+            Ts = self.tijdas(t0=t, n=n).tolist()
+            Vs = self._affiene_oplossing(affien[0], affien[1], V, methode, n).tolist()
+            return Ts, Vs
+
+        lus = kernels.kernel(kernel[0], methode) if kernel is not None and self.GEBRUIK_KERNELS else None
+        if lus is not None:
+            Ts = self.tijdas(t0=t, n=n).tolist()
+            if not vector:
+                return Ts, lus(V, n, self.delta_t, *kernel[1])
+            try:
+                return Ts, np.array(lus(V, n, self.delta_t, *kernel[1]))
+            except (ZeroDivisionError, OverflowError):
+                # Floats geven hier een exceptie waar numpy inf/NaN geeft: dan de lus hieronder
+                pass
+
+        stepper = self._kies_stepper(methode)
+        Ts = [t]
+        Vs = [V]
+
+        # Bij een toestandsvector rekent f met numpy; NaN/inf mag, net als in simuleer_batch
+        with np.errstate(all="ignore"):
+            for _ in range(n):
+                V = stepper(f, V, t, self.delta_t)
+                t += self.delta_t
+                Ts.append(t)
+                Vs.append(V)
+
+        if vector:
+            return Ts, np.array(Vs)
+        return Ts, Vs
+
+    def _simulate_systeem(self, naam, params, methode="rk4"):
+        """
+        Simuleer een model met toestandsvector (zie _SYSTEMEN) via _simulate, met
+        een gegenereerde kernel (kernels.KERNEL_SYSTEMEN) waar mogelijk.
+
+        Returns:
+            Ts (list[float]): tijdstappen
+            Ys (np.ndarray): toestand bij elke tijdstap, vorm (n+1, d)
+        """
+        rhs_factory, begintoestand, _ = self._SYSTEMEN[naam]
+        Y0 = np.array(begintoestand(params, float(self.start_volume)), dtype=float)
+        kernel_params = tuple(params[k] for k in kernels.KERNEL_SYSTEMEN[naam][0])
+        return self._simulate(rhs_factory(params), methode, V0=Y0, kernel=(naam, kernel_params))
+
+    def rhs(self, model_func, params):
+        """
+        Geef het rechterlid f(V, t) van een model met vaste parameters, zonder te simuleren.
+
+        Alle modellen lopen via _simulate; op een kopie van deze instantie wordt
+        _simulate vervangen door een functie die f direct teruggeeft. Een model met
+        vertraging heeft geen rechterlid f(V, t) (het hangt ook van V(t - tau) af)
+        en geeft een ValueError.
+        """
+        if self.heeft_vertraging(model_func):
+            raise ValueError(f"Model '{model_func.__name__}' heeft een vertraging en dus geen rechterlid f(V, t).")
+        sig = inspect.signature(model_func)
+        gefilterde_params = {k: v for k, v in params.items() if k in sig.parameters and k != 'methode'}
+
+        vanger = copy.copy(self)
+        vanger._simulate = lambda f, methode="rk4", **_: f
+        return getattr(vanger, model_func.__name__)(**gefilterde_params)
+
+    def verleng(self, model_func, params, V0, t0, n, methode="rk4"):
+        """
+        Simuleer een model n stappen verder vanaf toestand V0 op tijdstip t0.
+
+        Gebruikt de stap-voor-stap lus van _simulate met het rechterlid uit rhs(), zodat
+        een traject met dezelfde methode naadloos verlengd wordt. Niet voor modellen
+        met vertraging: die hebben de geschiedenis nodig, niet alleen V0.
+
+        Returns:
+            Ts, Vs zoals _simulate, beginnend bij (t0, V0)
+        """
+        return self._simulate(self.rhs(model_func, params), methode, V0=V0, t0=t0, n=n)
+
+    def traject(self, model_func, methode="rk4", **params):
+        """
+        Lui alternatief voor model_func(**params): geeft een Trajectory die pas
+        integreert als er om tijdstippen gevraagd wordt.
+
+        Voorbeeld:
+            traj = testTumor.traject(testTumor.gompertz_model, c=1, V_max=2)
+            eind = traj.eind_volume
+        """
+        if model_func.__name__ in self._SYSTEMEN:
+            raise ValueError("Trajectory ondersteunt alleen modellen met een scalaire toestand.")
+        if model_func.__name__ in self._BATCH_DDE:
+            raise ValueError("Trajectory ondersteunt geen modellen met vertraging.")
+        f = self.rhs(model_func, params)
+        return Trajectory(f, self._kies_stepper(methode), self.start_volume, self.delta_t, self.n)
+
+    def _integreer_dde(self, f, tau, V0, methode="rk4", stappen=None, dtype=np.float64, out=None):
+        """
+        Integreer een delay-differentiaalvergelijking dV/dt = f(V(t), V(t - tau), t) met vaste stap.
+
+        Voor t <= 0 is de geschiedenis constant V0. Alleen de laatste
+        ceil(max(tau)/delta_t) + 2 stappen worden bewaard, in een voorgealloceerde
+        ringbuffer; V(t - tau) tussen twee roosterpunten wordt lineair
+        geïnterpoleerd. Valt t - tau binnen de lopende stap (tau kleiner dan
+        delta_t), dan wordt geïnterpoleerd tussen het begin van de stap en de
+        toestand van de huidige tussenstap; met tau = 0 is het de gewone ODE.
+        Een kolom met een negatieve (of NaN) tau is ontoelaatbaar en krijgt NaN,
+        zodat zo'n parameterset in een fit of sweep een NaN MSE heeft.
+
+        Parameters:
+            f (callable): f(V, V_tau, t), werkend op arrays met vorm (m,)
+            tau (np.ndarray): vertraging per kolom, vorm (m,)
+            V0 (np.ndarray): beginvolume per kolom, vorm (m,)
+            methode (str): 'euler', 'heun' of 'rk4' (andere methoden: rk4)
+            stappen: te bewaren stapnummers (default 0..n)
+            out (np.ndarray): optioneel array met vorm (len(stappen), m) voor de uitvoer
+
+        Returns:
+            np.ndarray met vorm (len(stappen), m)
+        """
+        n = self.n
+        stappen = np.arange(n + 1) if stappen is None else stappen
+        ongeldig = ~(tau >= 0)
+        tau = np.where(ongeldig, 0.0, tau)
+        m = V0.shape
+        lengte = int(np.ceil(np.max(tau, initial=0.0) / self.delta_t)) + 2
+        buffer = np.empty((lengte,) + m)
+        buffer[:] = V0
+        kolommen = np.arange(V0.size).reshape(m)
+        vertraging = tau / self.delta_t
+
+        def vertraagd(k, a, W):
+            # V op (fractionele) stapindex x = k + a - tau/dt: uit de ringbuffer als x <= k,
+            # anders tussen V_k en de tussentoestand W op k + a; V0 voor x <= 0
+            x = k + a - vertraging
+            binnen = np.minimum(x, k)
+            i = np.floor(binnen).astype(int)
+            w = binnen - i
+            V_i = buffer[i % lengte, kolommen]
+            V_j = buffer[(i + 1) % lengte, kolommen]
+            waarde = np.where(w > 0, V_i + w * (V_j - V_i), V_i)
+            if a > 0:
+                V_k = buffer[k % lengte, kolommen]
+                waarde = np.where(x > k, V_k + (x - k) / a * (W - V_k), waarde)
+            return np.where(x <= 0, V0, waarde)
+
+        uitvoer = np.empty((len(stappen),) + m, dtype=dtype) if out is None else out
+        uitvoer[0] = V0
+        j = 1
+        volgende = stappen[j] if len(stappen) > 1 else -1
+        methode = methode.lower()
+        dt = self.delta_t
+        V = V0
         t = 0
+        with np.errstate(all="ignore"):
+            for k in range(n):
+                buffer[k % lengte] = V
+                if methode == "euler":
+                    V = V + f(V, vertraagd(k, 0, V), t) * dt
+                elif methode == "heun":
+                    k1 = f(V, vertraagd(k, 0, V), t)
+                    W = V + k1*dt
+                    k2 = f(W, vertraagd(k, 1, W), t + dt)
+                    V = V + 0.5 * (k1 + k2) * dt
+                else:
+                    k1 = f(V, vertraagd(k, 0, V), t)
+                    W = V + 0.5*k1*dt
+                    k2 = f(W, vertraagd(k, 0.5, W), t + 0.5*dt)
+                    W = V + 0.5*k2*dt
+                    k3 = f(W, vertraagd(k, 0.5, W), t + 0.5*dt)
+                    W = V + k3*dt
+                    k4 = f(W, vertraagd(k, 1, W), t + dt)
+                    V = V + (k1 + 2*k2 + 2*k3 + k4)/6 * dt
+                t += dt
+                if k + 1 == volgende:
+                    uitvoer[j] = V
+                    j += 1
+                    volgende = stappen[j] if j < len(stappen) else -1
+        uitvoer[:, ongeldig] = np.nan
+        return uitvoer
+
+    def _simulate_dde(self, naam, params, tau, methode="rk4"):
+        """
+        Simuleer een model met vertraging (zie _BATCH_DDE) voor één parameterset.
+
+        Returns:
+            Ts (list[float]), Vs (list[float]) zoals _simulate
+        """
+        f = self._BATCH_DDE[naam](params)
+        Vs = self._integreer_dde(f, np.array([float(tau)]), np.array([float(self.start_volume)]), methode)
+        return self.tijdas().tolist(), Vs[:, 0].tolist()
+
+    def tijdas(self, stride=1, t0=0.0, n=None):
+        """
+        Tijdstippen van een simulatie: t0, t0 + delta_t, ... (n stappen, default self.n).
+
+        De tijden zijn opeenvolgend opgeteld, net als t in de integratielussen, zodat
+        ze bit-gelijk zijn aan die van de stap-voor-stap simulatie. Met stride alleen
+        de bewaarde stappen (zie uitvoer_stappen), als bij simuleer_batch.
+
+        Returns:
+            np.ndarray met vorm (n+1,), of (len(uitvoer_stappen(stride)),)
+        """
+        n = self.n if n is None else n
+        Ts = np.cumsum(np.concatenate(([t0], np.full(n, self.delta_t))))
+        return Ts if stride == 1 else Ts[self.uitvoer_stappen(stride, n)]
+
+    def gevectoriseerd(self, model_func):
+        """True als simuleer_batch (en dus MSE_batch, de sweeps enz.) het model kent."""
+        naam = model_func if isinstance(model_func, str) else model_func.__name__
+        return naam in self._BATCH_RHS or naam in self._SYSTEMEN or naam in self._BATCH_DDE
+
+    def heeft_vertraging(self, model_func):
+        """True voor een model met vertraging (delay-differentiaalvergelijking, parameter tau)."""
+        naam = model_func if isinstance(model_func, str) else model_func.__name__
+        return naam in self._BATCH_DDE
+
+    def volume(self, model_func, Vs):
+        """Het gemeten volume uit de toestand(en) Vs van een model; Vs zelf bij een scalair model."""
+        naam = model_func if isinstance(model_func, str) else model_func.__name__
+        if naam in self._SYSTEMEN:
+            return self._SYSTEMEN[naam][2](Vs)
+        return Vs
+
+    def batch_params(self, model_func, params):
+        """
+        Vul ontbrekende parameters aan met de defaults van het model en maak er arrays van.
+
+        Returns:
+            params (dict met arrays), m (de gemeenschappelijke vorm, het aantal parametersets)
+        """
+        naam = model_func if isinstance(model_func, str) else model_func.__name__
+        for key, param in inspect.signature(getattr(self, naam)).parameters.items():
+            if key != 'methode' and key not in params and param.default is not param.empty:
+                params = {**params, key: param.default}
+
+        params = {k: np.atleast_1d(np.asarray(v, dtype=float)) for k, v in params.items()}
+        return params, np.broadcast_shapes(*(v.shape for v in params.values()))
+
+    def batch_begin(self, model_func, params, m):
+        """
+        Rhs-factory en begintoestand (vorm m of m + (d,)) voor een gebatchte simulatie.
+
+        De factory maakt van een dict met parameter-arrays (zie batch_params) een
+        gevectoriseerd rechterlid f(V, t); bij een model met vertraging f(V, V_tau, t).
+        """
+        naam = model_func if isinstance(model_func, str) else model_func.__name__
+        if naam in self._BATCH_DDE:
+            return self._BATCH_DDE[naam], np.full(m, float(self.start_volume))
+        if naam in self._SYSTEMEN:
+            rhs_factory, begintoestand, _ = self._SYSTEMEN[naam]
+            Y0 = np.stack([np.broadcast_to(np.asarray(y, dtype=float), m)
+                           for y in begintoestand(params, float(self.start_volume))], axis=-1)
+            return rhs_factory, Y0
+        return self._BATCH_RHS[naam], np.full(m, float(self.start_volume))
+
+    def _integreer_segmenten(self, maak_f, stepper, Y, punten, sprong):
+        """
+        Integreer stuksgewijs tussen opeenvolgende breekpunten.
+
+        Elk stuk [a, b] krijgt het kleinste aantal gelijke stappen van hoogstens
+        delta_t, zodat b precies geraakt wordt; daarna past sprong(b, Y) de
+        gebeurtenissen op b toe. Een sprong levert een extra punt op hetzelfde
+        tijdstip op (eerst de waarde ervoor, dan erna).
+
+        Parameters:
+            maak_f (callable): maak_f(a) geeft het rechterlid f(Y, t) voor het stuk vanaf a
+            sprong (callable): sprong(t, Y) geeft de nieuwe toestand, of Y zelf als er niets gebeurt
+        """
+        Ts = [punten[0]]
+        Vs = [Y]
+        na = sprong(punten[0], Y)
+        if na is not Y:
+            Y = na
+            Ts.append(punten[0])
+            Vs.append(Y)
+
+        for a, b in zip(punten[:-1], punten[1:]):
+            f = maak_f(a)
+            k = max(1, math.ceil((b - a) / self.delta_t * (1 - 1e-12)))
+            h = (b - a) / k
+            t = a
+            for i in range(1, k + 1):
+                Y = stepper(f, Y, t, h)
+                t = a + i * h
+                Ts.append(t)
+                Vs.append(Y)
+            Ts[-1] = b
+
+            na = sprong(b, Y)
+            if na is not Y:
+                Y = na
+                Ts.append(b)
+                Vs.append(Y)
 
-        for _ in range(self.n):
-            V = stepper(f, V, t, self.delta_t)
-            t += self.delta_t
-            Ts.append(t)
-            Vs.append(V)
+        return Ts, Vs
+
+    def simuleer_schema(self, model_func, schema, methode="rk4", **params):
+        """
+        Simuleer een model onder een behandelschema (zie behandeling.Behandelschema).
+
+        De tijdas 0..n*delta_t wordt bij elke dosis en venstergrens opgeknipt; binnen
+        een stuk wordt met (ongeveer) delta_t geïntegreerd en op de grenzen wordt de
+        sprong exact toegepast, dus zonder kleine stappen rond de discontinuïteiten.
+
+        Returns:
+            Ts (list[float]): tijdstippen, op een sprong twee keer hetzelfde tijdstip
+            Vs (list[float]): volumes (np.ndarray met vorm (k, d) bij een toestandsvector)
+        """
+        geldig = set(inspect.signature(model_func).parameters) - {'methode'}
+        for _, _, venster_params in schema.vensters:
+            onbekend = set(venster_params) - geldig
+            if onbekend:
+                raise ValueError(f"Onbekende parameters in venster: {', '.join(sorted(onbekend))}")
+
+        naam = model_func.__name__
+        Y0 = self.start_volume
+        if naam in self._SYSTEMEN:
+            basis = {**self.batch_params(naam, {})[0], **params}
+            Y0 = np.array(self._SYSTEMEN[naam][1](basis, float(self.start_volume)), dtype=float)
+
+        punten = schema.breekpunten(self.n * self.delta_t)
+        Ts, Vs = self._integreer_segmenten(lambda a: self.rhs(model_func, {**params, **schema.params_op(a)}),
+                                           self._kies_stepper(methode), Y0, punten, schema.sprong)
+        if naam in self._SYSTEMEN:
+            return Ts, np.array(Vs)
+        return Ts, Vs
+
+    def simuleer_schemas_batch(self, model_func, params, schemas, methode="rk4"):
+        """
+        Simuleer veel behandelschema's tegelijk, bv. om een schema te optimaliseren.
+
+        Alle schema's delen de vereniging van hun breekpunten, zodat elk stuk met
+        numpy over alle schema's tegelijk gestapt wordt; vensterparameters worden
+        per schema een array en sprongen worden alleen toegepast bij de schema's
+        die op dat tijdstip een gebeurtenis hebben.
+
+        Parameters:
+            model_func: modelmethode of de naam ervan
+            params (dict): basisparameters, scalars of arrays met één waarde per schema
+            schemas (list[Behandelschema]): m schema's
+
+        Returns:
+            Ts (np.ndarray): tijdstippen, vorm (k,)
+            Vs (np.ndarray): volumes, vorm (k, m) of (k, m, d) bij een toestandsvector
+        """
+        naam = model_func if isinstance(model_func, str) else model_func.__name__
+        if not self.gevectoriseerd(naam) or self.heeft_vertraging(naam):
+            raise ValueError(f"Geen gevectoriseerde versie van model '{naam}'.")
+
+        m = (len(schemas),)
+        params, vorm = self.batch_params(naam, params)
+        params = {k: np.broadcast_to(v, m) for k, v in params.items()}
+        if np.broadcast_shapes(vorm, m) != m:
+            raise ValueError("Parameterarrays moeten één waarde per schema hebben.")
+        rhs_factory, Y0 = self.batch_begin(naam, params, m)
+
+        def maak_f(a):
+            actief = [schema.params_op(a) for schema in schemas]
+            p = dict(params)
+            for key in set().union(*actief):
+                if key not in params:
+                    raise ValueError(f"Onbekende parameter in venster: {key}")
+                waarden = params[key].copy()
+                for j, overschrijving in enumerate(actief):
+                    if key in overschrijving:
+                        waarden[j] = overschrijving[key]
+                p[key] = waarden
+            return rhs_factory(p)
+
+        def sprong(t, Y):
+            nieuw = None
+            for j, schema in enumerate(schemas):
+                if t in schema.gebeurtenistijden():
+                    if nieuw is None:
+                        nieuw = Y.copy()
+                    nieuw[j] = schema.sprong(t, nieuw[j])
+            return Y if nieuw is None else nieuw
+
+        punten = gezamenlijke_breekpunten(schemas, self.n * self.delta_t)
+        with np.errstate(all="ignore"):
+            Ts, Vs = self._integreer_segmenten(maak_f, self._kies_stepper(methode), Y0, punten, sprong)
+        return np.array(Ts), np.array(Vs)
+
+    def uitvoer_stappen(self, stride, n=None):
+        """Stapnummers die bewaard worden: elke stride-de stap, plus altijd de laatste (n, default self.n)."""
+        if stride < 1:
+            raise ValueError("stride moet minstens 1 zijn.")
+        n = self.n if n is None else n
+        stappen = np.arange(0, n + 1, stride)
+        if stappen[-1] != n:
+            stappen = np.append(stappen, n)
+        return stappen
+
+    def toestand_dimensie(self, model_func):
+        """Lengte d van de toestandsvector van een model (1 voor de scalaire modellen)."""
+        naam = model_func if isinstance(model_func, str) else model_func.__name__
+        if naam not in self._SYSTEMEN:
+            return 1
+        # Alleen het aantal componenten telt, niet de waarden
+        return len(self._SYSTEMEN[naam][1](collections.defaultdict(float), 0.0))
+
+    def geheugen_schatting(self, m, stride=1, dtype=np.float64, d=1):
+        """
+        Schat het geheugengebruik van simuleer_batch voor m parametersets.
+
+        Parameters:
+            m (int): aantal parametersets
+            stride, dtype: zoals bij simuleer_batch
+            d (int): lengte van de toestandsvector (1 voor de scalaire modellen)
+
+        Returns:
+            dict met 'punten_per_traject', 'uitvoer_bytes' (Ts en Vs), 'werk_bytes'
+            (float64-toestand en tussenresultaten van de stappen) en 'totaal_bytes'
+        """
+        punten = len(self.uitvoer_stappen(stride))
+        uitvoer = punten * 8 + punten * m * d * np.dtype(dtype).itemsize
+        # V, k1..k4 en een paar tijdelijke arrays van een RK4-stap, altijd in float64
+        werk = 8 * m * d * 8
+        return {
+            "punten_per_traject": punten,
+            "uitvoer_bytes": uitvoer,
+            "werk_bytes": werk,
+            "totaal_bytes": uitvoer + werk
+        }
+
+    def simuleer_batch(self, model_func, params, methode="rk4", stride=1, dtype=np.float64, out=None):
+        """
+        Simuleer een model voor een hele batch parametersets in één keer.
+
+        De stappen worden met numpy over alle parametersets tegelijk gezet,
+        zodat m simulaties ongeveer evenveel Python-overhead kosten als één.
+
+        Voor grote sweeps kan de uitvoer compacter: met stride wordt alleen elke
+        stride-de stap bewaard (er wordt wel met delta_t geïntegreerd) en met
+        dtype=np.float32 worden de volumes in float32 opgeslagen terwijl de
+        toestand zelf in float64 blijft. Zie geheugen_schatting voor het effect.
+        Met out worden de volumes direct in een bestaand array geschreven (bv. een
+        view op gedeeld geheugen, zie sweep.traject_sweep) in plaats van in een nieuw.
+
+        Parameters:
+            model_func: modelmethode (bv. self.gompertz_model) of de naam ervan
+            params (dict): per parameter een array met één waarde per parameterset
+            methode (str): 'euler', 'heun', 'rk4', 'ab4' of 'abm4' met rk4 als default
+            stride (int): bewaar elke stride-de stap (en altijd de laatste)
+            dtype: dtype van de opgeslagen volumes
+            out (np.ndarray): optioneel uitvoerarray met de vorm van Vs (bepaalt dan ook de dtype)
+
+        Returns:
+            Ts (np.ndarray): tijdstappen, vorm (k,), met k = n+1 bij stride 1
+            Vs (np.ndarray): volumes, vorm (k, m); bij modellen met een
+                             toestandsvector (k, m, d)
+        """
+        naam = model_func if isinstance(model_func, str) else model_func.__name__
+        if not self.gevectoriseerd(naam):
+            raise ValueError(f"Geen gevectoriseerde versie van model '{naam}'.")
+
+        params, m = self.batch_params(naam, params)
+
+        stappen = self.uitvoer_stappen(stride)
+
+        def controleer(vorm):
+            if out is not None and out.shape != (len(stappen),) + vorm:
+                raise ValueError(f"out heeft vorm {out.shape}, verwacht {(len(stappen),) + vorm}.")
+
+        if naam in self._BATCH_DDE:
+            # Batching over tau: elke kolom heeft zijn eigen vertraging in dezelfde ringbuffer
+            Ts = self.tijdas(stride)
+            tau = np.broadcast_to(params["tau"], m).astype(float)
+            controleer(m)
+            Vs = self._integreer_dde(self._BATCH_DDE[naam](params), tau, np.full(m, float(self.start_volume)),
+                                     methode, stappen, dtype, out)
+            return Ts, Vs
+
+        if naam in self._BATCH_AFFIEN and methode.lower() not in self._MEERSTAPS:
+            a, b = self._BATCH_AFFIEN[naam](params)
+            Ts = self.tijdas(stride)
+            a, b = np.broadcast_arrays(a * np.ones(m), b * np.ones(m))
+            controleer(m)
+            if out is None:
+                Vs = self._affiene_oplossing(a, b, float(self.start_volume), methode, self.n, stappen)
+                return Ts, Vs.astype(dtype, copy=False)
+            # In blokken van rijen, zodat er geen volledig tijdelijk float64-traject nodig is
+            for begin in range(0, len(stappen), 64):
+                out[begin:begin + 64] = self._affiene_oplossing(a, b, float(self.start_volume), methode,
+                                                                self.n, stappen[begin:begin + 64])
+            return Ts, out
+
+        rhs_factory, V = self.batch_begin(naam, params, m)
+        f = rhs_factory(params)
+        stepper = self._kies_stepper(methode)
+
+        controleer(V.shape)
+        Ts = np.empty(len(stappen))
+        Vs = np.empty((len(stappen),) + V.shape, dtype=dtype) if out is None else out
+        t = 0
+        Ts[0] = t
+        Vs[0] = V
+
+        # NaN/inf (bv. log van een negatief getal) mag; die sets krijgen dan een NaN MSE
+        j = 1
+        volgende = stappen[j] if len(stappen) > 1 else -1
+        with np.errstate(all="ignore"):
+            for i in range(1, self.n + 1):
+                V = stepper(f, V, t, self.delta_t)
+                t += self.delta_t
+                if i == volgende:
+                    Ts[j] = t
+                    Vs[j] = V
+                    j += 1
+                    volgende = stappen[j] if j < len(stappen) else -1
 
         return Ts, Vs
 
 
     def lineaire_model(self, c, methode="rk4"):
         """Dv/Dt = c"""
-        return self._simulate(lambda V, t: c, methode)
+        return self._simulate(lambda V, t: c, methode, affien=(0, c), kernel=("lineaire_model", (c,)))
 
     def exponentieel_model(self, c, methode="rk4"):
         """Dv/Dt = c * V"""
-        return self._simulate(lambda V, t: c * V, methode)
+        return self._simulate(lambda V, t: c * V, methode, affien=(c, 0), kernel=("exponentieel_model", (c,)))
 
     def mendelsohn_model(self, c, d, methode="rk4"):
         """Dv/Dt = c * V^d"""
         # Anders math domain error..
-        return self._simulate(lambda V, t: c * math.pow(max(1e-6, V), d), methode)
+        return self._simulate(lambda V, t: c * math.pow(max(1e-6, V), d), methode,
+                              kernel=("mendelsohn_model", (c, d)))
 
     def logistisch_model(self, c, V_max, methode="rk4"):
         """Dv/Dt = c * V * (1 - V/Vmax)"""
-        return self._simulate(lambda V, t: c * V * (1 - V/V_max), methode)
+        return self._simulate(lambda V, t: c * V * (1 - V/V_max), methode,
+                              kernel=("logistisch_model", (c, V_max)))
 
     def gompertz_model(self, c, V_max, methode="rk4"):
         """Dv/Dt = c * V * ln(Vmax / V)"""
         # Mag geen log(0) zijn...
         func = lambda V, t: c * V * math.log(V_max / V) if V > 1e-9 else 0
-        return self._simulate(func, methode)
+        return self._simulate(func, methode, kernel=("gompertz_model", (c, V_max)))
 
     def von_bertalanffy_model(self, c, d, methode="rk4"):
         """Dv/Dt = c * V^(2/3) - d * V"""
-        return self._simulate(lambda V, t: c * math.pow(max(0, V), 2/3) - d * V, methode)
+        return self._simulate(lambda V, t: c * math.pow(max(0, V), 2/3) - d * V, methode,
+                              kernel=("von_bertalanffy_model", (c, d)))
 
     def exponentieel_afvlakkend_model(self, c, V_max, methode="rk4"):
         """Dv/Dt = c * (Vmax - V)"""
-        return self._simulate(lambda V, t: c * (V_max - V), methode)
+        return self._simulate(lambda V, t: c * (V_max - V), methode, affien=(-c, c * V_max),
+                              kernel=("exponentieel_afvlakkend_model", (c, V_max)))
 
     def allee_effect_model(self, c, V_min, V_max, methode="rk4"):
         """Dv/Dt = c * (V - Vmin) * (Vmax - V)"""
-        return self._simulate(lambda V, t: c * (V - V_min) * (V_max - V), methode)
+        return self._simulate(lambda V, t: c * (V - V_min) * (V_max - V), methode,
+                              kernel=("allee_effect_model", (c, V_min, V_max)))
 
     def lineair_gelimiteerd_model(self, c, d, methode="rk4"):
         """Dv/Dt = c * V / (V + d)"""
-        return self._simulate(lambda V, t: c * (V / (V + d)), methode)
+        return self._simulate(lambda V, t: c * (V / (V + d)), methode,
+                              kernel=("lineair_gelimiteerd_model", (c, d)))
 
     def oppervlak_gelimiteerd_model(self, c, d, methode="rk4"):
         """Dv/Dt = c * V / (V + d)^(1/3)"""
-        return self._simulate(lambda V, t: c * V / math.pow((V + d), 1/3), methode)
+        return self._simulate(lambda V, t: c * V / math.pow((V + d), 1/3), methode,
+                              kernel=("oppervlak_gelimiteerd_model", (c, d)))
+
+    def vertraagd_logistisch_model(self, c, V_max, tau, methode="rk4"):
+        """Dv/Dt = c * V(t) * (1 - V(t - tau)/Vmax)"""
+        return self._simulate_dde("vertraagd_logistisch_model", {"c": c, "V_max": V_max}, tau, methode)
+
+    def vertraagd_gompertz_model(self, c, V_max, tau, methode="rk4"):
+        """Dv/Dt = c * V(t) * ln(Vmax / V(t - tau))"""
+        return self._simulate_dde("vertraagd_gompertz_model", {"c": c, "V_max": V_max}, tau, methode)
+
+    def vertraagd_exponentieel_afvlakkend_model(self, c, V_max, tau, methode="rk4"):
+        """Dv/Dt = c * (Vmax - V(t - tau))"""
+        return self._simulate_dde("vertraagd_exponentieel_afvlakkend_model", {"c": c, "V_max": V_max}, tau,
+                                  methode)
+
+    def vertraagd_allee_effect_model(self, c, V_min, V_max, tau, methode="rk4"):
+        """Dv/Dt = c * (V(t) - Vmin) * (Vmax - V(t - tau))"""
+        return self._simulate_dde("vertraagd_allee_effect_model", {"c": c, "V_min": V_min, "V_max": V_max},
+                                  tau, methode)
+
+    # Rechterleden f(V, V_tau, t) van de modellen met vertraging: de verzadigingsterm
+    # reageert op het volume van tau tijd geleden. Werken op floats en op arrays.
+    _BATCH_DDE = {
+        "vertraagd_logistisch_model": lambda p: lambda V, Vt, t: p["c"] * V * (1 - Vt/p["V_max"]),
+        "vertraagd_gompertz_model": lambda p: lambda V, Vt, t: np.where(
+            (V > 1e-9) & (Vt > 1e-9), p["c"] * V * np.log(p["V_max"] / np.where(Vt > 1e-9, Vt, 1.0)), 0.0),
+        "vertraagd_exponentieel_afvlakkend_model": lambda p: lambda V, Vt, t: p["c"] * (p["V_max"] - Vt) + 0 * V,
+        "vertraagd_allee_effect_model": lambda p: lambda V, Vt, t: p["c"] * (V - p["V_min"]) * (p["V_max"] - Vt),
+    }
+
+
+    # Gevectoriseerde rechterleden voor simuleer_batch: elke factory krijgt een dict
+    # met parameter-arrays en geeft f(V, t) terug die op een array V werkt.
+    _BATCH_RHS = {
+        "lineaire_model": lambda p: lambda V, t: p["c"] + 0 * V,
+        "exponentieel_model": lambda p: lambda V, t: p["c"] * V,
+        "mendelsohn_model": lambda p: lambda V, t: p["c"] * np.power(np.maximum(1e-6, V), p["d"]),
+        "logistisch_model": lambda p: lambda V, t: p["c"] * V * (1 - V/p["V_max"]),
+        "gompertz_model": lambda p: lambda V, t: np.where(
+            V > 1e-9, p["c"] * V * np.log(p["V_max"] / np.where(V > 1e-9, V, 1.0)), 0.0),
+        "von_bertalanffy_model": lambda p: lambda V, t: p["c"] * np.power(np.maximum(0, V), 2/3) - p["d"] * V,
+        "exponentieel_afvlakkend_model": lambda p: lambda V, t: p["c"] * (p["V_max"] - V),
+        "allee_effect_model": lambda p: lambda V, t: p["c"] * (V - p["V_min"]) * (p["V_max"] - V),
+        "lineair_gelimiteerd_model": lambda p: lambda V, t: p["c"] * (V / (V + p["d"])),
+        "oppervlak_gelimiteerd_model": lambda p: lambda V, t: p["c"] * V / np.power(V + p["d"], 1/3),
+    }
+
+
+    def tumor_pk_model(self, c, V_max, k_el, e_max, EC50, C0, k12=0.0, k21=0.0, methode="rk4"):
+        """
+        Logistische groei onder een geneesmiddel met (twee-compartimenten) farmacokinetiek.
+
+        Toestand Y = [V, C, C_p] (volume, concentratie centraal en perifeer), met C0 als bolus op t=0:
+            dV/dt   = c * V * (1 - V/Vmax) - e_max * C / (EC50 + C) * V
+            dC/dt   = -(k_el + k12) * C + k21 * C_p
+            dC_p/dt = k12 * C - k21 * C_p
+
+        Returns:
+            Ts (list[float]), Ys (np.ndarray met vorm (n+1, 3))
+        """
+        params = {"c": c, "V_max": V_max, "k_el": k_el, "e_max": e_max, "EC50": EC50,
+                  "C0": C0, "k12": k12, "k21": k21}
+        return self._simulate_systeem("tumor_pk_model", params, methode)
+
+    def pqn_model(self, c, V_max, k_pq, k_qn, k_opruim=0.0, methode="rk4"):
+        """
+        Tumor met prolifererende (P), quiescente (Q) en necrotische (N) cellen.
+
+        Toestand Y = [P, Q, N], bij de start zijn alle cellen prolifererend:
+            dP/dt = c * P * (1 - (P + Q + N)/Vmax) - k_pq * P
+            dQ/dt = k_pq * P - k_qn * Q
+            dN/dt = k_qn * Q - k_opruim * N
+        Het gemeten volume is P + Q + N.
+
+        Returns:
+            Ts (list[float]), Ys (np.ndarray met vorm (n+1, 3))
+        """
+        params = {"c": c, "V_max": V_max, "k_pq": k_pq, "k_qn": k_qn, "k_opruim": k_opruim}
+        return self._simulate_systeem("pqn_model", params, methode)
+
+    # Modellen met een toestandsvector Y (laatste as = compartimenten). Per model de
+    # rhs-factory (zoals in _BATCH_RHS), de begintoestand(params, V0) en het gemeten volume uit Y.
+    _SYSTEMEN = {
+        "tumor_pk_model": (_tumor_pk_rhs, lambda p, V0: (V0, p["C0"], 0.0), lambda Y: Y[..., 0]),
+        "pqn_model": (_pqn_rhs, lambda p, V0: (V0, 0.0, 0.0), lambda Y: Y.sum(axis=-1)),
+    }
 
 
     def MSE(self, model_func, methode, params, data_ts, data_vs):
@@ -144,6 +923,7 @@ class tumorODE:
 
         # Simuleer model
         model_ts, model_vs = model_func(methode=methode, **gefilterde_params)
+        model_vs = self.volume(model_func, model_vs)
 
         # Interpoleer model resultaten op exact dezelfde tijdstippen als de data
         model_interp = np.interp(data_ts, model_ts, model_vs)
@@ -152,62 +932,438 @@ class tumorODE:
         errors = np.array(data_vs) - model_interp
         return np.mean(errors ** 2)
 
+    # (a, b) van de affiene modellen dV/dt = a*V + b; die worden in simuleer_batch exact opgelost
+    _BATCH_AFFIEN = {
+        "lineaire_model": lambda p: (0.0, p["c"]),
+        "exponentieel_model": lambda p: (p["c"], 0.0),
+        "exponentieel_afvlakkend_model": lambda p: (-p["c"], p["c"] * p["V_max"]),
+    }
+
+    def _interp_batch(self, data_ts, Ts, Vs):
+        """
+        Lineaire interpolatie (zoals np.interp) van alle kolommen van Vs op data_ts.
+
+        Returns:
+            np.ndarray met vorm (len(data_ts), m)
+        """
+        data_ts = np.asarray(data_ts, dtype=float)
+        idx = np.clip(np.searchsorted(Ts, data_ts, side="right") - 1, 0, len(Ts) - 2)
+        t0, t1 = Ts[idx], Ts[idx + 1]
+        w = np.clip((data_ts - t0) / (t1 - t0), 0.0, 1.0)
+        with np.errstate(invalid="ignore", over="ignore"):
+            return Vs[idx] * (1 - w)[:, None] + Vs[idx + 1] * w[:, None]
+
+    def MSE_batch(self, model_func, methode, params, data_ts, data_vs, stride=1, dtype=np.float64):
+        """
+        Bereken de MSE voor een batch parametersets met één gevectoriseerde simulatie.
+
+        Parameters:
+            params (dict): per parameter een array met één waarde per parameterset
+            stride, dtype: uitvoeropties van simuleer_batch (er wordt tussen de
+                           bewaarde punten geïnterpoleerd)
+
+        Returns:
+            np.ndarray met één MSE per parameterset (NaN als de simulatie ontspoort)
+        """
+        sig = inspect.signature(model_func)
+        gefilterde_params = {k: v for k, v in params.items() if k in sig.parameters}
+
+        model_ts, model_vs = self.simuleer_batch(model_func, gefilterde_params, methode, stride, dtype)
+        model_vs = self.volume(model_func, model_vs)
+        model_interp = self._interp_batch(data_ts, model_ts, model_vs.astype(float, copy=False))
+
+        errors = np.asarray(data_vs, dtype=float)[:, None] - model_interp
+        with np.errstate(over="ignore", invalid="ignore"):
+            return np.mean(errors ** 2, axis=0)
+
     def hooke_jeeves(self, model_func, params, data_ts, data_vs, methode="rk4",
-                     tol=1e-6, alpha_up=1.2, alpha_down=0.5, max_iter=10000):
+                     tol=1e-6, alpha_up=1.2, alpha_down=0.5, max_iter=10000,
+                     annuleer=None, voortgang=None, checkpoint=None, checkpoint_elke=100,
+                     checkpoint_extra=None, resume=None, delta_schaal=0.1, start_mse=None,
+                     terugroep=None, stoppen=(), grenzen=None, transformaties=None, _stoppen_lopend=False):
         """
         Hooke & Jeeves / Direct Search optimalisatie.
         Zoekt parameters die de MSE minimaliseren.
+
+        annuleer is een optioneel threading.Event(-achtig) object; als het gezet wordt
+        stopt de zoektocht na de lopende iteratie met het beste resultaat tot dan toe.
+        voortgang(iteratie, params, mse) wordt na elke iteratie aangeroepen.
+
+        terugroep(stand) wordt na elke iteratie aangeroepen met een dict stand
+        ('iteratie', 'params', 'mse', 'evaluaties' (aantal MSE-berekeningen) en
+        'verstreken' (seconden)); geeft hij iets waars terug, dan stopt de zoektocht.
+        stoppen is een lijst stopregels met dezelfde aanroep (zie stopregels:
+        Tijdslimiet, MaxEvaluaties, Stagnatie) die na elke parameterstap worden
+        gecontroleerd; hun start() wordt aan het begin van de fit aangeroepen, dus
+        de limieten gelden per aanroep. In beide gevallen is het resultaat het
+        beste tot dan toe.
+
+        Met checkpoint (pad) wordt elke checkpoint_elke iteraties en aan het eind de
+        toestand (params, deltas, MSE, iteratie en eventueel checkpoint_extra)
+        weggeschreven. resume (pad naar zo'n checkpoint) gaat precies verder waar
+        de zoektocht gebleven was, met hetzelfde resultaat als een ononderbroken run.
+
+        delta_schaal bepaalt de eerste stapgrootte (delta_schaal * max(1, |waarde|));
+        een kleinere waarde past bij een warme start dicht bij het optimum. Als de
+        MSE van de startparameters al bekend is kan die als start_mse worden meegegeven.
+
+        grenzen (parameter -> (laag, hoog)) en transformaties (parameter -> 'log' of
+        'logit', of één transformatie voor alle parameters) beperken de zoekruimte,
+        zie parameterruimte.ParameterRuimte. Getransformeerde parameters worden in
+        de onbegrensde ruimte gezocht (stappen en deltas gelden daar); een stap
+        buiten de grenzen telt als geen verbetering en wordt niet gesimuleerd.
         """
         sig = inspect.signature(model_func)
         valid_keys = [k for k in sig.parameters.keys() if k != 'methode']
-        
-        # Stapgrootte initialisatie
-        deltas = {k: 0.1 * max(1.0, abs(v)) for k, v in params.items() if k in valid_keys}
-        
-        huidige_mse = self.MSE(model_func, methode, params, data_ts, data_vs)
-        iteratie = 0
+        begin = time.perf_counter()
+        evaluaties = 0
+        if not _stoppen_lopend:
+            # Binnen multi_start lopen de regels door over de starts
+            for regel in stoppen:
+                regel.start()
+        ruimte = None
+        if grenzen or transformaties:
+            ruimte = ParameterRuimte(grenzen, transformaties, [k for k in valid_keys if k in params])
+
+        def waarden():
+            # Parameterwaarden bij de huidige zoekcoördinaten x
+            return x if ruimte is None else ruimte.terug(x)
+
+        def doel():
+            nonlocal evaluaties
+            kandidaat = waarden()
+            if ruimte is not None and not ruimte.toegestaan(kandidaat):
+                return math.inf
+            evaluaties += 1
+            return self.MSE(model_func, methode, kandidaat, data_ts, data_vs)
+
+        if resume is not None:
+            toestand = lees_checkpoint(resume)
+            if toestand["model"] != model_func.__name__:
+                raise ValueError(f"Checkpoint hoort bij {toestand['model']}, niet bij {model_func.__name__}.")
+            params.update(toestand["params"])
+            # Met een parameterruimte staan de zoekcoördinaten er exact in (geen afronding door terugrekenen)
+            x = params if ruimte is None else {**ruimte.naar(params), **toestand.get("x", {})}
+            deltas = toestand["deltas"]
+            huidige_mse = toestand["mse"]
+            iteratie = toestand["iteratie"]
+        else:
+            if ruimte is not None and not ruimte.toegestaan(params):
+                raise ValueError("De startparameters liggen niet binnen de grenzen.")
+            # Zonder parameterruimte zijn de zoekcoördinaten de parameters zelf
+            x = params if ruimte is None else ruimte.naar(params)
+            # Stapgrootte initialisatie
+            deltas = {k: delta_schaal * max(1.0, abs(v)) for k, v in x.items() if k in valid_keys}
+
+            if start_mse is None:
+                huidige_mse = doel()
+            else:
+                huidige_mse = start_mse
+            iteratie = 0
+
+        def bewaar():
+            toestand = {
+                "model": model_func.__name__,
+                "params": {k: v for k, v in waarden().items() if k in valid_keys},
+                "deltas": deltas,
+                "mse": float(huidige_mse),
+                "iteratie": iteratie,
+                "extra": checkpoint_extra
+            }
+            if ruimte is not None:
+                toestand["x"] = {k: x[k] for k in valid_keys if k in x}
+            schrijf_checkpoint(checkpoint, toestand)
+
+        def stand():
+            return {
+                "iteratie": iteratie,
+                "params": {k: v for k, v in waarden().items() if k in valid_keys},
+                "mse": huidige_mse,
+                "evaluaties": evaluaties,
+                "verstreken": time.perf_counter() - begin
+            }
 
-        while max(abs(d) for d in deltas.values()) > tol and iteratie < max_iter:
+        gestopt = False
+
+        while max(abs(d) for d in deltas.values()) > tol and iteratie < max_iter and not gestopt:
+            if annuleer is not None and annuleer.is_set():
+                break
             iteratie += 1
             for key in valid_keys:
-                if key not in params: continue
+                if key not in x: continue
                 
                 verbeterd = False
-                beste_waarde_in_stap = params[key]
+                beste_waarde_in_stap = x[key]
                 
                 # Probeer parameter te verhogen
-                params[key] += deltas[key]
-                up_mse = self.MSE(model_func, methode, params, data_ts, data_vs)
+                x[key] += deltas[key]
+                up_mse = doel()
                 
                 if up_mse < huidige_mse:
                     huidige_mse = up_mse
-                    beste_waarde_in_stap = params[key]
+                    beste_waarde_in_stap = x[key]
                     deltas[key] *= alpha_up # Versnel
                     verbeterd = True
                 else:
                     # Probeer parameter te verlagen (terug naar origineel - delta)
-                    params[key] -= 2 * deltas[key] 
-                    down_mse = self.MSE(model_func, methode, params, data_ts, data_vs)
+                    x[key] -= 2 * deltas[key] 
+                    down_mse = doel()
                     
                     if down_mse < huidige_mse:
                         huidige_mse = down_mse
-                        beste_waarde_in_stap = params[key]
+                        beste_waarde_in_stap = x[key]
                         deltas[key] *= alpha_up # Versnel
                         verbeterd = True
                     else:
                         # Geen verbetering, reset naar origineel
-                        params[key] += deltas[key]
+                        x[key] += deltas[key]
 
-                params[key] = beste_waarde_in_stap
+                x[key] = beste_waarde_in_stap
                 
                 # Als er geen verbetering is gevonden, verklein de stapgrootte
                 if not verbeterd:
                     deltas[key] *= alpha_down
 
+                if stoppen:
+                    huidig = stand()
+                    if any([regel(huidig) for regel in stoppen]):
+                        gestopt = True
+                        break
+
+            if voortgang is not None:
+                voortgang(iteratie, {k: v for k, v in waarden().items() if k in valid_keys}, huidige_mse)
+            if terugroep is not None and terugroep(stand()):
+                gestopt = True
+
+            if checkpoint is not None and iteratie % checkpoint_elke == 0:
+                bewaar()
+
+        if checkpoint is not None:
+            bewaar()
+
         # Return alleen relevante params
+        params.update(waarden())
         eind_params = {k: v for k, v in params.items() if k in valid_keys}
         return eind_params, huidige_mse
 
+    @staticmethod
+    def _verstoor_start(ruimte, params, namen, spreiding, rng):
+        """Willekeurig startpunt rond params dat binnen de parameterruimte ligt (zie multi_start)."""
+        x = ruimte.naar(params)
+        start = dict(params)
+        for k in namen:
+            stap = spreiding * rng.standard_normal()
+            if k in ruimte.transformaties:
+                start[k] = ruimte.terug({k: x[k] + stap})[k]
+            else:
+                laag, hoog = ruimte.grenzen.get(k, (-math.inf, math.inf))
+                start[k] = min(max(params[k] * math.exp(stap), laag), hoog)
+        return {k: start[k] for k in namen}
+
+    def multi_start(self, model_func, params, data_ts, data_vs, methode="rk4", n_starts=10,
+                    spreiding=1.0, seed=None, checkpoint=None, checkpoint_elke=100, resume=None,
+                    **opties):
+        """
+        Hooke & Jeeves vanuit meerdere startpunten, het beste resultaat wint.
+
+        De eerste start is params zelf; de volgende starts vermenigvuldigen elke
+        parameter met exp(spreiding * N(0, 1)); met grenzen/transformaties (zie
+        hooke_jeeves) wordt een getransformeerde parameter in de zoekruimte met
+        spreiding * N(0, 1) verschoven en een begrensde parameter binnen zijn
+        grenzen gehouden. Stopregels (stoppen) gelden voor alle
+        starts samen: een verlopen Tijdslimiet of MaxEvaluaties slaat de overige
+        starts over, net als een terugroep die om stoppen vraagt. Het checkpoint bevat naast de
+        toestand van de lopende hooke_jeeves ook de RNG-toestand, de index van de
+        start en het beste resultaat tot nu toe, zodat resume bit-voor-bit verder gaat.
+
+        Returns:
+            eind_params (dict), mse
+        """
+        sig = inspect.signature(model_func)
+        valid_keys = [k for k in sig.parameters.keys() if k != 'methode' and k in params]
+        rng = np.random.default_rng(seed)
+        beste_params, beste_mse = None, math.inf
+        eerste = 0
+        start = dict(params)
+        begin = time.perf_counter()
+        ruimte = None
+        if opties.get("grenzen") or opties.get("transformaties"):
+            ruimte = ParameterRuimte(opties.get("grenzen"), opties.get("transformaties"), valid_keys)
+        stoppen = opties.get("stoppen", ())
+        for regel in stoppen:
+            regel.start()
+        terugroep = opties.get("terugroep")
+        gevraagd = []
+        if terugroep is not None:
+            def vraag_stop(stand):
+                # Onthoud dat de aanroeper wil stoppen, zodat ook de volgende starts vervallen
+                if terugroep(stand):
+                    gevraagd.append(stand["iteratie"])
+                    return True
+                return False
+            opties["terugroep"] = vraag_stop
+
+        if resume is not None:
+            extra = lees_checkpoint(resume)["extra"]
+            rng.bit_generator.state = extra["rng"]
+            eerste = extra["start"]
+            beste_params, beste_mse = extra["beste_params"], extra["beste_mse"]
+
+        for i in range(eerste, n_starts):
+            if i > eerste:
+                # Tussen twee starts: een nieuwe run (iteratie en evaluaties weer 0)
+                tussenstand = {"iteratie": 0, "params": beste_params, "mse": beste_mse, "evaluaties": 0,
+                               "verstreken": time.perf_counter() - begin}
+                if gevraagd or any([regel(tussenstand) for regel in stoppen]):
+                    break
+            hervat = resume if (resume is not None and i == eerste) else None
+            if i > 0 and hervat is None:
+                if ruimte is None:
+                    start = {k: params[k] * math.exp(spreiding * rng.standard_normal()) for k in valid_keys}
+                else:
+                    start = self._verstoor_start(ruimte, params, valid_keys, spreiding, rng)
+
+            extra = {
+                "rng": rng.bit_generator.state,
+                "start": i,
+                "beste_params": beste_params,
+                "beste_mse": beste_mse
+            }
+            eind_params, mse = self.hooke_jeeves(model_func, dict(start), data_ts, data_vs, methode=methode,
+                                                 checkpoint=checkpoint, checkpoint_elke=checkpoint_elke,
+                                                 checkpoint_extra=extra, resume=hervat, _stoppen_lopend=True,
+                                                 **opties)
+            if mse < beste_mse:
+                beste_params, beste_mse = eind_params, float(mse)
+
+            annuleer = opties.get("annuleer")
+            if annuleer is not None and annuleer.is_set():
+                break
+
+        return beste_params, beste_mse
+
+    def differential_evolution(self, model_func, params, data_ts, data_vs, methode="rk4",
+                               grenzen=None, pop_grootte=None, F=0.8, CR=0.9,
+                               max_generaties=300, tol=1e-8, polish=True, seed=None,
+                               annuleer=None, voortgang=None, terugroep=None, stoppen=(), transformaties=None):
+        """
+        Differential evolution (rand/1/bin) als globale optimalisatie van de MSE.
+
+        De MSE van de hele populatie wordt per generatie met één gevectoriseerde
+        simulatie (MSE_batch) berekend. Optioneel wordt het beste resultaat daarna
+        met hooke_jeeves lokaal verfijnd.
+
+        Parameters:
+            params (dict): startwaarden, worden als eerste lid in de populatie gezet
+            grenzen (dict): per parameter (laag, hoog); default (0.1*v, 10*v) rond de startwaarde
+            pop_grootte (int): populatiegrootte, default 15 * aantal parameters
+            F (float): mutatiefactor
+            CR (float): crossover-kans
+            max_generaties (int): maximaal aantal generaties
+            tol (float): stop als std(MSE) <= tol * |gemiddelde MSE| van de populatie
+            polish (bool): verfijn het beste punt met hooke_jeeves (binnen de opgegeven grenzen)
+            seed: seed voor de random generator
+            annuleer: optioneel threading.Event(-achtig) object, stopt tussen generaties
+            voortgang: optionele functie voortgang(generatie, beste_params, beste_mse)
+            terugroep, stoppen: als bij hooke_jeeves, na elke generatie aangeroepen met de
+                                stand van het beste lid ('iteratie' is de generatie); de
+                                stopregels lopen door in de polish
+            transformaties: niet ondersteund (ValueError); de populatie ligt al binnen de
+                            grenzen, gebruik hooke_jeeves of multi_start voor transformaties
+
+        Returns:
+            eind_params (dict), mse
+        """
+        if transformaties:
+            raise ValueError("differential_evolution zoekt binnen de grenzen en kent geen transformaties; "
+                             "gebruik hooke_jeeves of multi_start voor getransformeerde parameters.")
+        sig = inspect.signature(model_func)
+        valid_keys = [k for k in sig.parameters.keys() if k != 'methode' and k in params]
+        k = len(valid_keys)
+        rng = np.random.default_rng(seed)
+        begin = time.perf_counter()
+        evaluaties = 0
+        for regel in stoppen:
+            regel.start()
+
+        # De grenzen van de gebruiker gelden ook voor de polish; de defaults zijn alleen zoekbereik
+        gebruikers_grenzen = {key: grenzen[key] for key in valid_keys if key in (grenzen or {})}
+        grenzen = dict(grenzen or {})
+        for key in valid_keys:
+            if key not in grenzen:
+                v = params[key]
+                grenzen[key] = tuple(sorted((0.1 * v, 10 * v))) if v != 0 else (-1.0, 1.0)
+        laag = np.array([grenzen[key][0] for key in valid_keys], dtype=float)
+        hoog = np.array([grenzen[key][1] for key in valid_keys], dtype=float)
+
+        def evalueer(pop):
+            nonlocal evaluaties
+            evaluaties += len(pop)
+            mse = self.MSE_batch(model_func, methode, dict(zip(valid_keys, pop.T)), data_ts, data_vs)
+            return np.where(np.isnan(mse), np.inf, mse)
+
+        N = pop_grootte or 15 * k
+        pop = laag + rng.random((N, k)) * (hoog - laag)
+        pop[0] = np.clip([params[key] for key in valid_keys], laag, hoog)
+        fitness = evalueer(pop)
+
+        gestopt = False
+        for generatie in range(1, max_generaties + 1):
+            if annuleer is not None and annuleer.is_set():
+                break
+
+            # Kies per lid drie verschillende andere leden r1, r2, r3
+            R = rng.random((N, N))
+            np.fill_diagonal(R, np.inf)
+            r1, r2, r3 = np.argsort(R, axis=1)[:, :3].T
+
+            mutant = pop[r1] + F * (pop[r2] - pop[r3])
+            # Buiten de grenzen: spiegel terug naar binnen
+            mutant = np.where(mutant < laag, 2 * laag - mutant, mutant)
+            mutant = np.where(mutant > hoog, 2 * hoog - mutant, mutant)
+            mutant = np.clip(mutant, laag, hoog)
+
+            kruis = rng.random((N, k)) < CR
+            kruis[np.arange(N), rng.integers(k, size=N)] = True
+            proef = np.where(kruis, mutant, pop)
+
+            proef_fitness = evalueer(proef)
+            beter = proef_fitness <= fitness
+            pop[beter] = proef[beter]
+            fitness[beter] = proef_fitness[beter]
+
+            if voortgang is not None:
+                beste = int(np.argmin(fitness))
+                voortgang(generatie, dict(zip(valid_keys, pop[beste].tolist())), float(fitness[beste]))
+
+            if terugroep is not None or stoppen:
+                beste = int(np.argmin(fitness))
+                stand = {"iteratie": generatie, "params": dict(zip(valid_keys, pop[beste].tolist())),
+                         "mse": float(fitness[beste]), "evaluaties": evaluaties,
+                         "verstreken": time.perf_counter() - begin}
+                gestopt = terugroep is not None and bool(terugroep(stand))
+                if any([regel(stand) for regel in stoppen]) or gestopt:
+                    gestopt = True
+                    break
+
+            eindig = fitness[np.isfinite(fitness)]
+            if len(eindig) == N and np.std(eindig) <= tol * abs(np.mean(eindig)):
+                break
+
+        beste = int(np.argmin(fitness))
+        eind_params = {key: float(v) for key, v in zip(valid_keys, pop[beste])}
+        huidige_mse = float(fitness[beste])
+
+        if polish and not gestopt and not (annuleer is not None and annuleer.is_set()):
+            gepolijst, polish_mse = self.hooke_jeeves(model_func, dict(eind_params), data_ts, data_vs,
+                                                      methode=methode, annuleer=annuleer,
+                                                      grenzen=gebruikers_grenzen, terugroep=terugroep,
+                                                      stoppen=stoppen, _stoppen_lopend=True)
+            if polish_mse < huidige_mse:
+                eind_params, huidige_mse = gepolijst, polish_mse
+
+        return eind_params, huidige_mse
+
     def informatie_criteria(self, mse, n_data, n_params):
         """
         Bereken AIC, AICc (voor kleine datasets) en BIC.
@@ -227,17 +1383,41 @@ class tumorODE:
 
         return aic, aicc, bic
 
-    def fit_and_evaluate(self, model_func, start_params, data_ts, data_vs, methode="rk4"):
+    def fit_and_evaluate(self, model_func, start_params, data_ts, data_vs, methode="rk4",
+                         optimizer="hooke_jeeves", cache=None, **optimizer_opties):
         """
         Fit een model op data en retourneer MSE, AIC, en optimale parameters.
+
+        optimizer is 'hooke_jeeves' (lokaal, default), 'multi_start' (hooke_jeeves vanuit
+        meerdere startpunten) of 'de' (differential evolution, globaal); extra
+        keyword-argumenten gaan door naar de gekozen optimizer. Met cache (een
+        fitcache.FitCache) komt een identieke fit direct uit de persistente cache.
         """
-        best_params, mse = self.hooke_jeeves(model_func, start_params, data_ts, data_vs, methode=methode)
+        optimizers = {
+            "hooke_jeeves": self.hooke_jeeves,
+            "de": self.differential_evolution,
+            "multi_start": self.multi_start
+        }
+        if optimizer not in optimizers:
+            raise ValueError(f"Onbekende optimizer '{optimizer}', kies uit {list(optimizers)}.")
+
+        sleutel = None
+        if cache is not None:
+            sleutel = cache.sleutel(self, model_func.__name__, start_params, data_ts, data_vs, methode,
+                                    optimizer, optimizer_opties)
+            resultaat = cache.haal(sleutel) if sleutel is not None else None
+            if resultaat is not None:
+                resultaat["functie"] = model_func
+                return resultaat
+
+        best_params, mse = optimizers[optimizer](model_func, start_params, data_ts, data_vs,
+                                                 methode=methode, **optimizer_opties)
         n_data = len(data_vs)
         n_params = len(best_params)
         
         aic, aicc, bic = self.informatie_criteria(mse, n_data, n_params)
 
-        return {
+        resultaat = {
             "model_naam": model_func.__name__,
             "functie": model_func,
             "best_params": best_params,
@@ -246,16 +1426,24 @@ class tumorODE:
             "AICc": aicc,
             "BIC": bic
         }
+        if sleutel is not None:
+            cache.bewaar(sleutel, resultaat)
+        return resultaat
 
 
-    def plot(self, Ts, Vs, color=None, label=None):
-        """Plot een enkele simulatielijn."""
+    def plot(self, Ts, Vs=None, color=None, label=None):
+        """Plot een enkele simulatielijn (Ts, Vs of een Trajectory als Ts)."""
+        # matplotlib pas hier laden: rekenwerk (bv. batch-workers) heeft het niet nodig
+        import matplotlib.pyplot as plt
 
+        if isinstance(Ts, Trajectory):
+            Ts, Vs = Ts.ts, Ts.vs
         plt.plot(Ts, Vs, color=color, label=label)
 
 
-    def show_plot(self, titel="Tumor Groei Simulatie"):
-        """Maak de grafiek op en toon deze."""
+    def show_plot(self, titel="Tumor Groei Simulatie", bestand=None):
+        """Maak de grafiek op en toon deze, of sla hem op als bestand (png/svg) is opgegeven."""
+        import matplotlib.pyplot as plt
 
        
         plt.axvline(0.0, color='k', linestyle='--', alpha=0.5)
@@ -264,4 +1452,14 @@ class tumorODE:
         plt.title(titel)
         plt.legend()
         plt.grid(True, alpha=0.3)
-        plt.show()
+        if bestand is not None:
+            plt.savefig(bestand)
+            plt.close()
+        else:
+            plt.show()
+
+
+if __name__ == "__main__":
+    import sys
+    from batch_fit import main
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import collections
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+
+def aantal_workers(n_workers=None):
+    """Aantal processen: n_workers, of het aantal cores als dat niet opgegeven is."""
+    return n_workers or os.cpu_count() or 1
+
+
+def verdeel(functie, taken, n_workers=None, max_lopend=None, volgorde=False):
+    """
+    Voer functie(*args) uit voor alle args in taken, verdeeld over een procespool.
+
+    taken wordt lui doorlopen en er staan nooit meer dan max_lopend taken (default
+    n_workers) tegelijk uit, zodat het geheugen niet van het aantal taken afhangt.
+    Met één worker draait alles in dit proces, zonder pool. Gaat er in een taak iets
+    mis (of stopt de aanroeper eerder), dan worden de taken die nog niet lopen
+    geannuleerd voordat de pool afgesloten wordt.
+
+    Parameters:
+        functie: op module-niveau, zodat hij naar de workers kan
+        taken: iterable met een tupel argumenten per taak
+        n_workers (int): aantal processen, default het aantal cores
+        max_lopend (int): maximaal aantal ingediende, nog niet opgehaalde taken
+        volgorde (bool): resultaten in de volgorde van taken in plaats van zodra ze klaar zijn
+
+    Yields:
+        de resultaten van functie
+    """
+    n_workers = aantal_workers(n_workers)
+    if n_workers == 1:
+        for args in taken:
+            yield functie(*args)
+        return
+
+    max_lopend = max_lopend or n_workers
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        lopend = collections.deque()
+        try:
+            for args in taken:
+                if len(lopend) >= max_lopend:
+                    yield from _oogst(lopend, volgorde)
+                lopend.append(pool.submit(functie, *args))
+            while lopend:
+                yield from _oogst(lopend, volgorde)
+        finally:
+            for toekomst in lopend:
+                toekomst.cancel()
+
+
+def _oogst(lopend, volgorde):
+    """Haal de oudste taak (volgorde) of alle afgeronde taken uit lopend en geef hun resultaten."""
+    if volgorde:
+        yield lopend[0].result()
+        lopend.popleft()
+        return
+    klaar, _ = wait(lopend, return_when=FIRST_COMPLETED)
+    for toekomst in klaar:
+        lopend.remove(toekomst)
+    for toekomst in klaar:
+        yield toekomst.result()